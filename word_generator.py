@@ -3,62 +3,245 @@
 
 import requests
 import re
-from typing import List, Set
+import os
+import time
+import bz2
+import gzip
+import urllib.parse
+import math
+import heapq
+import random
+import hashlib
+import bisect
+import zlib
+import shutil
+import tempfile
+import struct
+import argparse
+from itertools import islice, chain
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Set, Dict, Tuple, Optional, Callable, Iterator, Iterable
 import json
 
-def get_russian_words() -> Set[str]:
-    """Загружает список русских слов из интернета"""
+RUSSIAN_ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+# Таблицы для str.translate при загрузке словаря
+_DELETE_RUSSIAN_TABLE = str.maketrans('', '', RUSSIAN_ALPHABET)
+_FOLD_YO_TABLE = str.maketrans('ё', 'е')
+
+# Таблица для bytes.translate: байт буквы в cp1251 -> номер буквы в RUSSIAN_ALPHABET
+_NOT_A_LETTER_CODE = 255
+_SIGNATURE_CODE_TABLE = bytes(RUSSIAN_ALPHABET.find(bytes([byte]).decode('cp1251', 'replace')) % 256
+                              for byte in range(256))
+
+# Коды букв в WordList: номер буквы в алфавите, упорядоченном по кодам символов,
+# поэтому байтовые строки кодов сравниваются так же, как сами слова
+_WORD_CODE_ALPHABET = ''.join(sorted(RUSSIAN_ALPHABET))
+_WORD_CODE_INVALID = 255
+_ENCODE_WORD_TABLE = bytes(_WORD_CODE_ALPHABET.find(bytes([byte]).decode('cp1251', 'replace')) % 256
+                           for byte in range(256))
+_DECODE_WORD_TABLE = _WORD_CODE_ALPHABET.encode('cp1251').ljust(256, b'?')
+# Сколько слов WordList кодирует и декодирует за раз
+WORD_LIST_CHUNK = 4096
+
+# Условия фиксированной задачи CLI в том же формате, что и в GUI
+DEFAULT_CONDITIONS = {
+    'word_length': 5,
+    'forbidden_letters': {'с', 'л', 'о', 'а', 'х', 'и'},
+    'required_letters': {'в'},
+    'positional_must': {'р': [1]},  # {буква: [позиции (0-based)]}
+    'positional_forbidden': {'в': [3, 4]},  # {буква: [позиции (0-based)]}
+    'only_nouns': True,
+    'exclude_verbs': True,
+    'letter_counts': {}  # {буква: (минимум, максимум или None)}
+}
+
+# Сглаживание весов выборки: буквы и биграммы, которых нет в словаре, остаются возможными
+SAMPLE_WEIGHT_SMOOTHING = 1e-6
+
+# Кэш буквенной n-граммной модели, обученной на словаре
+NGRAM_MODEL_FILE = "ngram_model.json"
+
+# Снимок результатов фиксированной задачи CLI между запусками
+SNAPSHOT_FILE = "results_snapshot.bin"
+SNAPSHOT_MAGIC = b'WGSNAP1\n'
+
+# Строка со словом в файле результатов ("   1. слово") и в простом списке слов ("слово")
+_NUMBERED_WORD_LINE = re.compile(r'^\s*\d+\.\s+([а-яё]+)\s*$')
+_PLAIN_WORD_LINE = re.compile(r'^\s*([а-яё]+)\s*$')
+
+# Источники словаря по умолчанию: URL, локальные файлы или архивы .gz/.bz2
+DICTIONARY_SOURCES = [
+    "https://raw.githubusercontent.com/danakt/russian-words/master/russian.txt"
+]
+
+# Имя источника для базового списка слов
+FALLBACK_SOURCE = 'встроенный'
+
+# Базовый список слов на случай, если ни один словарь не загрузился
+FALLBACK_WORDS = {
+    'абвгд', 'еёжзи', 'йклмн', 'опрст', 'уфхцч', 'шщъыь', 'эюя',
+    'метла', 'булка', 'гнула', 'джула', 'жмула', 'звука', 'играл',
+    'книга', 'лапша', 'мама', 'ночь', 'окно', 'печь', 'рука',
+    'стол', 'тень', 'ухо', 'флаг', 'хлеб', 'царь', 'чай',
+    'шар', 'щетка', 'эхо', 'юла', 'яма',
+    # Дополнительные 5-буквенные слова
+    'вода', 'огонь', 'земля', 'небо', 'море', 'лес', 'поле', 'гора', 'река',
+    'город', 'село', 'дом', 'сад', 'путь', 'день', 'год', 'час', 'минута',
+    'ветер', 'солнце', 'луна', 'звезда', 'снег', 'дождь', 'облако', 'туча',
+    'цветок', 'дерево', 'трава', 'лист', 'корень', 'ветка', 'плод', 'семя',
+    'живот', 'птица', 'рыба', 'зверь', 'насекомое', 'бабочка', 'муравей',
+    'человек', 'ребенок', 'мальчик', 'девочка', 'мужчина', 'женщина',
+    'друг', 'семья', 'брат', 'сестра', 'отец', 'мать', 'бабушка', 'дедушка',
+    'учитель', 'врач', 'инженер', 'продавец', 'водитель', 'повар',
+    'школа', 'университет', 'больница', 'магазин', 'театр', 'кино',
+    'музей', 'библиотека', 'стадион', 'парк', 'площадь', 'улица',
+    'дорога', 'мост', 'забор', 'стена', 'окно', 'дверь', 'крыша',
+    'стол', 'стул', 'кровать', 'шкаф', 'полка', 'зеркало', 'лампа',
+    'книга', 'тетрадь', 'ручка', 'карандаш', 'линейка', 'ножницы',
+    'чашка', 'тарелка', 'ложка', 'вилка', 'нож', 'кастрюля', 'сковорода',
+    'хлеб', 'молоко', 'сыр', 'мясо', 'рыба', 'яйцо', 'картошка', 'морковь',
+    'яблоко', 'груша', 'виноград', 'клубника', 'малина', 'черника',
+    'одежда', 'рубашка', 'брюки', 'платье', 'юбка', 'кофта', 'куртка',
+    'шапка', 'шарф', 'перчатки', 'ботинки', 'сапоги', 'туфли',
+    'игрушка', 'мяч', 'кукла', 'машинка', 'конструктор', 'пазл',
+    'игра', 'песня', 'танец', 'рисунок', 'картина', 'фотография',
+    'письмо', 'телефон', 'компьютер', 'телевизор', 'радио', 'часы',
+    'ключ', 'замок', 'сумка', 'кошелек', 'очки', 'зонт', 'зонтик',
+    'велосипед', 'автомобиль', 'поезд', 'самолет', 'корабль', 'лодка',
+    'утро', 'день', 'вечер', 'ночь', 'неделя', 'месяц', 'сезон',
+    'весна', 'лето', 'осень', 'зима', 'январь', 'февраль', 'март',
+    'апрель', 'май', 'июнь', 'июль', 'август', 'сентябрь', 'октябрь',
+    'ноябрь', 'декабрь', 'понедельник', 'вторник', 'среда', 'четверг',
+    'пятница', 'суббота', 'воскресенье'
+}
+
+def make_conditions(**overrides) -> dict:
+    """Создает условия без ограничений, дополненные переданными значениями"""
+    conditions = {
+        'word_length': 5,
+        'forbidden_letters': set(),
+        'required_letters': set(),
+        'positional_must': {},
+        'positional_forbidden': {},
+        'only_nouns': False,
+        'exclude_verbs': False,
+        'letter_counts': {},
+        'max_edits': 0,
+        'substitutions_only': False
+    }
+    conditions.update(overrides)
+    return conditions
+
+def get_russian_words(word_length: Optional[int] = 5, sources: Optional[List[str]] = None,
+                      fold_yo: bool = False) -> Set[str]:
+    """Загружает список русских слов из источников словаря (word_length=None - слова любой длины)"""
+    return load_dictionary_index(sources, word_length, fold_yo).words
+
+def source_name(location: str) -> str:
+    """Имя источника словаря - имя файла без пути"""
+    return os.path.basename(urllib.parse.urlparse(location).path) or location
+
+def normalize_word(line: str, fold_yo: bool = False) -> Optional[str]:
+    """Приводит строку словаря к слову в нижнем регистре или возвращает None, если это не русское слово"""
+    word = line.strip().lower()
+    if fold_yo:
+        word = word.translate(_FOLD_YO_TABLE)
+    # После удаления всех русских букв от корректного слова ничего не остается
+    return word if word and not word.translate(_DELETE_RUSSIAN_TABLE) else None
+
+def _decode_line(raw: bytes) -> str:
+    """Декодирует строку словаря из UTF-8, а при ошибке - из cp1251"""
     try:
-        # Попробуем загрузить словарь с GitHub
-        url = "https://raw.githubusercontent.com/danakt/russian-words/master/russian.txt"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            words = set()
-            for line in response.text.split('\n'):
-                word = line.strip().lower()
-                if len(word) == 5 and re.match(r'^[а-яё]+$', word):
-                    words.add(word)
-            return words
-    except:
-        pass
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        # Байта 0x98 в cp1251 нет: испорченная строка получит символ замены и не пройдет normalize_word
+        return raw.decode('cp1251', 'replace')
+
+def _iter_source_lines(location: str) -> Iterator[bytes]:
+    """Построчно читает источник словаря, не держа в памяти весь текст"""
+    if location.startswith(('http://', 'https://')):
+        with requests.get(location, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            yield from response.iter_lines(chunk_size=1 << 16)
+        return
+
+    if location.endswith('.gz'):
+        opener = gzip.open
+    elif location.endswith('.bz2'):
+        opener = bz2.open
+    else:
+        opener = open
+    # Архив распаковывается потоково, буферизованными блоками
+    with opener(location, 'rb') as f:
+        yield from f
+
+def add_dictionary_lines(buckets: Dict[int, Set[str]], lines: Iterable[bytes], word_length: Optional[int] = 5,
+                         fold_yo: bool = False) -> Dict[int, Set[str]]:
+    """Нормализует строки словаря и раскладывает подходящие слова по длине: {длина: слова}"""
+    for raw in lines:
+        # Русская буква занимает 1 байт в cp1251 и 2 байта в UTF-8 - заведомо чужие длины не декодируем
+        if word_length is not None and not word_length <= len(raw.strip()) <= 2 * word_length:
+            continue
+        word = normalize_word(_decode_line(raw), fold_yo)
+        if word and (word_length is None or len(word) == word_length):
+            buckets.setdefault(len(word), set()).add(word)
+    return buckets
+
+def read_dictionary_source(location: str, word_length: Optional[int] = 5,
+                           fold_yo: bool = False) -> Dict[int, Set[str]]:
+    """Читает слова из URL, текстового файла или архива .gz/.bz2 за один проход"""
+    return add_dictionary_lines({}, _iter_source_lines(location), word_length, fold_yo)
+
+def source_names(sources: List[str]) -> List[str]:
+    """Возвращает уникальные имена источников (при совпадении имен файлов - полный путь)"""
+    names = []
+    for location in sources:
+        name = source_name(location)
+        names.append(location if name in names else name)
+    return names
+
+def merge_dictionaries(names: List[str], results: List[Optional[Dict[int, Set[str]]]]) -> 'WordIndex':
+    """Объединяет слова источников (None - источник не загрузился) в индекс без повторов"""
+    word_sources = {}
+    by_length = {}
+    for bit, buckets in enumerate(results):
+        for length, words in (buckets or {}).items():
+            by_length.setdefault(length, set()).update(words)
+            for word in words:
+                word_sources[word] = word_sources.get(word, 0) | (1 << bit)
+    return WordIndex(word_sources.keys(), word_sources, names, by_length)
+
+def load_dictionaries(sources: List[str], word_length: Optional[int] = 5, fold_yo: bool = False,
+                      max_workers: int = 4) -> 'WordIndex':
+    """Загружает несколько словарей параллельно и объединяет их в один индекс с пометкой источников"""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(read_dictionary_source, location, word_length, fold_yo)
+                   for location in sources]
+        results = []
+        for location, future in zip(sources, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"⚠️ Не удалось загрузить словарь {location}: {e}")
+                results.append(None)
+
+    return merge_dictionaries(source_names(sources), results)
+
+def load_dictionary_index(sources: Optional[List[str]] = None, word_length: Optional[int] = 5,
+                          fold_yo: bool = False) -> 'WordIndex':
+    """Загружает словари в индекс, а если ничего не загрузилось - базовый список слов"""
+    index = load_dictionaries(sources or DICTIONARY_SOURCES, word_length, fold_yo)
+    if index.words:
+        return index
     
     # Если не удалось загрузить, используем расширенный базовый список
-    return {
-        'абвгд', 'еёжзи', 'йклмн', 'опрст', 'уфхцч', 'шщъыь', 'эюя',
-        'метла', 'булка', 'гнула', 'джула', 'жмула', 'звука', 'играл',
-        'книга', 'лапша', 'мама', 'ночь', 'окно', 'печь', 'рука',
-        'стол', 'тень', 'ухо', 'флаг', 'хлеб', 'царь', 'чай',
-        'шар', 'щетка', 'эхо', 'юла', 'яма',
-        # Дополнительные 5-буквенные слова
-        'вода', 'огонь', 'земля', 'небо', 'море', 'лес', 'поле', 'гора', 'река',
-        'город', 'село', 'дом', 'сад', 'путь', 'день', 'год', 'час', 'минута',
-        'ветер', 'солнце', 'луна', 'звезда', 'снег', 'дождь', 'облако', 'туча',
-        'цветок', 'дерево', 'трава', 'лист', 'корень', 'ветка', 'плод', 'семя',
-        'живот', 'птица', 'рыба', 'зверь', 'насекомое', 'бабочка', 'муравей',
-        'человек', 'ребенок', 'мальчик', 'девочка', 'мужчина', 'женщина',
-        'друг', 'семья', 'брат', 'сестра', 'отец', 'мать', 'бабушка', 'дедушка',
-        'учитель', 'врач', 'инженер', 'продавец', 'водитель', 'повар',
-        'школа', 'университет', 'больница', 'магазин', 'театр', 'кино',
-        'музей', 'библиотека', 'стадион', 'парк', 'площадь', 'улица',
-        'дорога', 'мост', 'забор', 'стена', 'окно', 'дверь', 'крыша',
-        'стол', 'стул', 'кровать', 'шкаф', 'полка', 'зеркало', 'лампа',
-        'книга', 'тетрадь', 'ручка', 'карандаш', 'линейка', 'ножницы',
-        'чашка', 'тарелка', 'ложка', 'вилка', 'нож', 'кастрюля', 'сковорода',
-        'хлеб', 'молоко', 'сыр', 'мясо', 'рыба', 'яйцо', 'картошка', 'морковь',
-        'яблоко', 'груша', 'виноград', 'клубника', 'малина', 'черника',
-        'одежда', 'рубашка', 'брюки', 'платье', 'юбка', 'кофта', 'куртка',
-        'шапка', 'шарф', 'перчатки', 'ботинки', 'сапоги', 'туфли',
-        'игрушка', 'мяч', 'кукла', 'машинка', 'конструктор', 'пазл',
-        'игра', 'песня', 'танец', 'рисунок', 'картина', 'фотография',
-        'письмо', 'телефон', 'компьютер', 'телевизор', 'радио', 'часы',
-        'ключ', 'замок', 'сумка', 'кошелек', 'очки', 'зонт', 'зонтик',
-        'велосипед', 'автомобиль', 'поезд', 'самолет', 'корабль', 'лодка',
-        'утро', 'день', 'вечер', 'ночь', 'неделя', 'месяц', 'сезон',
-        'весна', 'лето', 'осень', 'зима', 'январь', 'февраль', 'март',
-        'апрель', 'май', 'июнь', 'июль', 'август', 'сентябрь', 'октябрь',
-        'ноябрь', 'декабрь', 'понедельник', 'вторник', 'среда', 'четверг',
-        'пятница', 'суббота', 'воскресенье'
-    }
+    return fallback_index()
+
+def fallback_index() -> 'WordIndex':
+    """Индекс из базового списка слов"""
+    return WordIndex(FALLBACK_WORDS, {word: 1 for word in FALLBACK_WORDS}, [FALLBACK_SOURCE])
 
 def is_noun(word: str) -> bool:
     """Проверяет, является ли слово существительным"""
@@ -157,84 +340,1274 @@ def is_verb(word: str) -> bool:
     
     return False
 
-def filter_words_by_conditions(words: Set[str]) -> List[str]:
-    """Фильтрует слова по заданным условиям"""
-    # Запрещенные буквы
-    forbidden_letters = {'с', 'л', 'о', 'а', 'х', 'и'}
-    
-    # Доступные буквы (все русские буквы кроме запрещенных)
-    all_russian_letters = set('абвгдеёжзийклмнопрстуфхцчшщъыьэюя')
-    available_letters = all_russian_letters - forbidden_letters
-    
+def filter_words_by_conditions(words: Set[str], conditions: Optional[dict] = None) -> List[str]:
+    """Фильтрует слова по заданным условиям (по умолчанию - условия фиксированной задачи).
+
+    Если в условиях задано max_edits, позиционные условия и запрещенные
+    буквы допускают до max_edits правок (substitutions_only - только замены букв).
+    """
+    if conditions is None:
+        conditions = DEFAULT_CONDITIONS
+    index = words if isinstance(words, WordIndex) else WordIndex(words)
+
+    if conditions.get('max_edits'):
+        candidates = fuzzy_filter_words(index, conditions)
+    else:
+        # Запрещенные и обязательные буквы проверяем по векторам количества букв
+        bounds = signature_bounds(conditions)
+        words, signatures = index.signature_table(conditions['word_length'])
+        size = len(RUSSIAN_ALPHABET)
+        candidates = [word for i, word in enumerate(words)
+                      if matches_signature(signatures, bounds, i * size)
+                      and matches_positions(word, conditions)]
+
     filtered_words = []
-    
-    for word in words:
-        if len(word) != 5:
-            continue
-            
-        # Проверяем, что слово содержит только доступные буквы
-        if not all(letter in available_letters for letter in word):
-            continue
-        
-        # Проверяем, что в слове есть буква "В"
-        if 'в' not in word:
-            continue
-        
-        # Проверяем, что буква "В" не на четвертой и пятой позиции
-        if word[3] == 'в' or word[4] == 'в':
-            continue
-        
-        # Проверяем, что в слове есть буква "Р" на второй позиции
-        if word[1] != 'р':
-            continue
-            
+    for word in candidates:
         # Проверяем, что слово является существительным
-        if not is_noun(word):
+        if conditions['only_nouns'] and not is_noun(word):
             continue
         
         # Дополнительная проверка на глаголы
-        if is_verb(word):
+        if conditions['exclude_verbs'] and is_verb(word):
             continue
         
         filtered_words.append(word)
     
     return sorted(filtered_words)
 
-def generate_possible_words() -> List[str]:
+def filter_words_batch(words: Set[str], conditions_list: List[dict]) -> List[List[str]]:
+    """Фильтрует слова сразу по нескольким наборам условий, разделяя общую работу.
+
+    Наборы группируются по общей части (длина, запрещенные и обязательные
+    буквы с количеством): она считается один раз по обратным индексам
+    словаря. Позиционные условия затем уточняют закешированное множество
+    по одному, так что наборы с общими позициями разделяют промежуточные
+    результаты. Результат для каждого набора такой же, как у
+    filter_words_by_conditions.
+    """
+    index = words if isinstance(words, WordIndex) else WordIndex(words)
+    refined = {}  # {(общая часть, позиционные условия): множество слов}
+    nouns = {}
+    verbs = {}
+    results = []
+
+    for conditions in conditions_list:
+        if conditions.get('max_edits'):
+            results.append(filter_words_by_conditions(index, conditions))
+            continue
+
+        word_length = conditions['word_length']
+        bounds = tuple(signature_bounds(conditions))
+        base_key = (word_length, bounds)
+        by_letter, by_position = index.inverted_index(word_length)
+
+        if base_key not in refined:
+            empty = set()
+            required = [index_ for index_, low, high in bounds if low > 0]
+            if required:
+                # Пересекаем множества обязательных букв, начиная с самого маленького
+                sets = sorted((by_letter.get(RUSSIAN_ALPHABET[i], empty) for i in required), key=len)
+                candidates = set(sets[0]).intersection(*sets[1:])
+            else:
+                candidates = set(index.words_of_length(word_length))
+            for i, low, high in bounds:
+                if high == 0:
+                    candidates -= by_letter.get(RUSSIAN_ALPHABET[i], empty)
+            if any(high not in (0, 255) or low > 1 for i, low, high in bounds):
+                candidates = {word for word in candidates if matches_signature(letter_signature(word), bounds)}
+            refined[base_key] = candidates
+
+        # Позиционные условия применяем по одному в постоянном порядке
+        steps = sorted([(True, pos, letter) for letter, positions in conditions['positional_must'].items()
+                        for pos in positions] +
+                       [(False, pos, letter) for letter, positions in conditions['positional_forbidden'].items()
+                        for pos in positions])
+        key = base_key
+        candidates = refined[base_key]
+        for step in steps:
+            key = (key, step)
+            if key not in refined:
+                must, pos, letter = step
+                matching = by_position.get((pos, letter), set())
+                refined[key] = candidates & matching if must else candidates - matching
+            candidates = refined[key]
+
+        filtered_words = []
+        for word in candidates:
+            if conditions['only_nouns']:
+                if word not in nouns:
+                    nouns[word] = is_noun(word)
+                if not nouns[word]:
+                    continue
+            if conditions['exclude_verbs']:
+                if word not in verbs:
+                    verbs[word] = is_verb(word)
+                if verbs[word]:
+                    continue
+            filtered_words.append(word)
+        results.append(sorted(filtered_words))
+
+    return results
+
+def generate_possible_words() -> 'WordList':
     """Генерирует возможные слова по условиям"""
-    # Базовые доступные буквы (исключая запрещенные: с, л, о, а, х, и)
-    available_letters = {'б', 'в', 'г', 'д', 'е', 'ё', 'ж', 'з', 'й', 'к', 'м', 'н', 'п', 'р', 'т', 'у', 'ф', 'ц', 'ч', 'ш', 'щ', 'ъ', 'ы', 'ь', 'э', 'ю', 'я'}
-    
-    possible_words = []
-    
-    # Генерируем все возможные комбинации с обязательными буквами "В" и "Р"
-    for l1 in available_letters:
-        for l2 in available_letters:
-            for l3 in available_letters:
-                for l4 in available_letters:
-                    for l5 in available_letters:
-                        word = l1 + l2 + l3 + l4 + l5
-                        # Проверяем, что в слове есть буква "В" с позиционными ограничениями и "Р" на 2-й позиции
-                        if ('в' in word and word[3] != 'в' and word[4] != 'в' and 
-                            word[1] == 'р'):
-                            possible_words.append(word)
-    
-    return sorted(list(set(possible_words)))
-
-def save_words_to_file(words: List[str], filename: str, title: str):
-    """Сохраняет список слов в файл"""
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(f"{title}\n")
-        f.write("=" * 50 + "\n")
-        f.write(f"Всего найдено: {len(words)}\n")
-        f.write("=" * 50 + "\n\n")
-        
-        for i, word in enumerate(words, 1):
-            f.write(f"{i:4d}. {word}\n")
+    # Перебор идет по отсортированному алфавиту, поэтому слова сразу упорядочены и не повторяются
+    return WordList.from_words(iter_possible_words(DEFAULT_CONDITIONS), DEFAULT_CONDITIONS['word_length'])
+
+def iter_possible_words(conditions: dict) -> Iterator[str]:
+    """Перебирает комбинации по условиям лениво, в алфавитном порядке и без повторов"""
+    allowed, counts = compile_conditions(conditions)
+    start, advance, deficit = _count_tracker(counts)
+    word_length = len(allowed)
+
+    def walk(prefix: str, state: Tuple[int, ...]) -> Iterator[str]:
+        position = len(prefix)
+        if deficit(state) > word_length - position:
+            return
+        if position == word_length:
+            yield prefix
+            return
+        for letter in allowed[position]:
+            next_state = advance(state, letter)
+            if next_state is not None:
+                yield from walk(prefix + letter, next_state)
+
+    return walk('', start)
+
+class WordList:
+    """Компактный список слов одной длины: по байту на букву в общем буфере.
+
+    Поддерживает len, индексы, срезы и перебор; проверка `in` - двоичный
+    поиск, поэтому слова должны идти в алфавитном порядке (как их выдает
+    iter_possible_words). Строки создаются только при обращении к словам.
+    """
+
+    __slots__ = ('word_length', '_codes')
+
+    def __init__(self, codes: bytes = b'', word_length: int = 5):
+        self.word_length = word_length
+        self._codes = bytes(codes)
+
+    @classmethod
+    def from_words(cls, words: Iterable[str], word_length: int) -> 'WordList':
+        """Упаковывает слова заданной длины, кодируя их пачками"""
+        codes = bytearray()
+        words = iter(words)
+        while True:
+            chunk = list(islice(words, WORD_LIST_CHUNK))
+            if not chunk:
+                break
+            text = ''.join(chunk)
+            if len(text) != len(chunk) * word_length:
+                raise ValueError(f"Все слова должны быть длиной {word_length}")
+            try:
+                encoded = text.encode('cp1251').translate(_ENCODE_WORD_TABLE)
+            except UnicodeEncodeError:
+                encoded = bytes([_WORD_CODE_INVALID])
+            if _WORD_CODE_INVALID in encoded:
+                raise ValueError("Слова должны состоять из русских букв")
+            codes += encoded
+        return cls(codes, word_length)
+
+    def _decode(self, start: int, stop: int) -> str:
+        """Декодирует слова с номерами [start, stop) в одну строку"""
+        size = self.word_length
+        return self._codes[start * size:stop * size].translate(_DECODE_WORD_TABLE).decode('cp1251')
+
+    def __len__(self) -> int:
+        return len(self._codes) // self.word_length if self.word_length else 0
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            size = self.word_length
+            if step == 1:
+                return WordList(self._codes[start * size:max(start, stop) * size], size)
+            return WordList(b''.join(self._codes[i * size:(i + 1) * size] for i in range(start, stop, step)), size)
+        count = len(self)
+        if item < 0:
+            item += count
+        if not 0 <= item < count:
+            raise IndexError("индекс вне списка слов")
+        return self._decode(item, item + 1)
+
+    def __iter__(self) -> Iterator[str]:
+        size = self.word_length
+        count = len(self)
+        for start in range(0, count, WORD_LIST_CHUNK):
+            text = self._decode(start, min(start + WORD_LIST_CHUNK, count))
+            for offset in range(0, len(text), size):
+                yield text[offset:offset + size]
+
+    def write_numbered(self, f, start: int = 1) -> int:
+        """Пишет слова нумерованными строками, по одной записи на пачку декодированных слов"""
+        size = self.word_length
+        count = len(self)
+        for first in range(0, count, WORD_LIST_CHUNK):
+            last = min(first + WORD_LIST_CHUNK, count)
+            text = self._decode(first, last)
+            number = start + first
+            f.write(''.join(f"{number + i:4d}. {text[i * size:(i + 1) * size]}\n" for i in range(last - first)))
+        return count
+
+    def __contains__(self, word) -> bool:
+        if not isinstance(word, str) or len(word) != self.word_length:
+            return False
+        try:
+            key = word.encode('cp1251').translate(_ENCODE_WORD_TABLE)
+        except UnicodeEncodeError:
+            return False
+        size = self.word_length
+        codes = self._codes
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if codes[mid * size:(mid + 1) * size] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < len(self) and codes[lo * size:(lo + 1) * size] == key
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, WordList):
+            return self.word_length == other.word_length and self._codes == other._codes
+        if isinstance(other, list):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"WordList({len(self)} слов длиной {self.word_length})"
+
+def compile_letter_counts(conditions: dict) -> Dict[str, Tuple[int, Optional[int]]]:
+    """Сводит обязательные буквы и ограничения количества в {буква: (минимум, максимум)}"""
+    word_length = conditions['word_length']
+    counts = {letter: (1, None) for letter in conditions['required_letters']}
+
+    # Буква с обязательными позициями встречается как минимум столько раз, сколько у нее позиций
+    for letter, positions in conditions['positional_must'].items():
+        low = max(1, len({pos for pos in positions if 0 <= pos < word_length}))
+        counts[letter] = (max(low, counts.get(letter, (0, None))[0]), None)
+
+    for letter, (low, high) in conditions.get('letter_counts', {}).items():
+        current_low, current_high = counts.get(letter, (0, None))
+        if current_high is not None:
+            high = current_high if high is None else min(high, current_high)
+        counts[letter] = (max(low, current_low), high)
+    return counts
+
+def compile_conditions(conditions: dict) -> Tuple[List[List[str]], Dict[str, Tuple[int, Optional[int]]]]:
+    """Переводит условия в списки допустимых букв по позициям и ограничения количества букв"""
+    word_length = conditions['word_length']
+    counts = compile_letter_counts(conditions)
+    forbidden_letters = set(conditions['forbidden_letters'])
+    # Буква, которой разрешено встретиться 0 раз, равносильна запрещенной
+    forbidden_letters |= {letter for letter, (low, high) in counts.items() if high == 0}
+    available_letters = [letter for letter in RUSSIAN_ALPHABET if letter not in forbidden_letters]
+
+    allowed = [set(available_letters) for _ in range(word_length)]
+    for letter, positions in conditions['positional_must'].items():
+        for pos in positions:
+            if 0 <= pos < word_length:
+                allowed[pos] &= {letter}
+    for letter, positions in conditions['positional_forbidden'].items():
+        for pos in positions:
+            if 0 <= pos < word_length:
+                allowed[pos].discard(letter)
+
+    counts = {letter: bounds for letter, bounds in counts.items() if bounds[1] != 0}
+    return [sorted(letters) for letters in allowed], counts
+
+def letter_signature(word: str) -> bytes:
+    """Возвращает вектор количества каждой буквы алфавита в слове"""
+    signature = bytearray(len(RUSSIAN_ALPHABET))
+    for letter in word:
+        index = RUSSIAN_ALPHABET.find(letter)
+        if index >= 0:
+            signature[index] += 1
+    return bytes(signature)
+
+def signature_bounds(conditions: dict) -> List[Tuple[int, int, int]]:
+    """Переводит запрещенные, обязательные буквы и их количество в границы (индекс, минимум, максимум)"""
+    bounds = {RUSSIAN_ALPHABET.index(letter): (0, 0)
+              for letter in conditions['forbidden_letters'] if letter in RUSSIAN_ALPHABET}
+    for letter, (low, high) in compile_letter_counts(conditions).items():
+        if letter in RUSSIAN_ALPHABET:
+            index = RUSSIAN_ALPHABET.index(letter)
+            current_low, current_high = bounds.get(index, (0, 255))
+            bounds[index] = (max(low, current_low), min(255 if high is None else high, current_high))
+    return [(index, low, high) for index, (low, high) in sorted(bounds.items())]
+
+def letter_signatures(words: List[str], word_length: int) -> bytes:
+    """Строит векторы количества букв для слов одной длины одним буфером, вектор за вектором"""
+    size = len(RUSSIAN_ALPHABET)
+    try:
+        codes = ''.join(words).encode('cp1251').translate(_SIGNATURE_CODE_TABLE)
+    except UnicodeEncodeError:
+        codes = None
+    if codes is None or _NOT_A_LETTER_CODE in codes or len(codes) != len(words) * word_length:
+        # Есть символы не из алфавита - считаем по словам
+        return b''.join(letter_signature(word) for word in words)
+
+    table = bytearray(size * len(words))
+    for position, code in enumerate(codes):
+        table[position // word_length * size + code] += 1
+    return bytes(table)
+
+def matches_signature(signature: bytes, bounds: List[Tuple[int, int, int]], offset: int = 0) -> bool:
+    """Проверяет вектор количества букв слова (начиная с offset в буфере) по границам из signature_bounds"""
+    for index, low, high in bounds:
+        if not low <= signature[offset + index] <= high:
+            return False
+    return True
+
+class WordIndex:
+    """Словарь вместе с предвычисленными структурами для быстрых запросов"""
+
+    def __init__(self, words: Set[str], word_sources: Optional[Dict[str, int]] = None,
+                 source_names: Optional[List[str]] = None, by_length: Optional[Dict[int, Set[str]]] = None):
+        self.words = set(words)
+        self._by_length = by_length
+        # {слово: битовая маска источников}, бит i - источник source_names[i]
+        self.word_sources = word_sources or {}
+        self.source_names = source_names or []
+        self._signature_tables = {}  # {длина слова: (слова, их векторы количества букв подряд)}
+        self._anagrams = None
+        self._anagram_keys = None
+        self._sorted_words = None
+        self._sorted_by_length = {}
+        self._inverted = {}  # {длина слова: (буква -> слова, (позиция, буква) -> слова)}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def words_of_length(self, length: int) -> Set[str]:
+        """Возвращает слова заданной длины (группы по длине строятся при загрузке или один раз)"""
+        if self._by_length is None:
+            self._by_length = {}
+            for word in self.words:
+                self._by_length.setdefault(len(word), set()).add(word)
+        return self._by_length.get(length, set())
+
+    def sources_of(self, word: str) -> List[str]:
+        """Возвращает имена источников, в которых есть слово"""
+        mask = self.word_sources.get(word, 0)
+        return [name for bit, name in enumerate(self.source_names) if mask & (1 << bit)]
+
+    def restrict(self, names: List[str]) -> 'WordIndex':
+        """Возвращает индекс только со словами из указанных источников, без повторной загрузки"""
+        mask = 0
+        for bit, name in enumerate(self.source_names):
+            if name in names:
+                mask |= 1 << bit
+        word_sources = {word: sources & mask for word, sources in self.word_sources.items()
+                        if sources & mask}
+        return WordIndex(word_sources.keys(), word_sources, self.source_names)
+
+    def inverted_index(self, length: int) -> Tuple[Dict[str, Set[str]], Dict[Tuple[int, str], Set[str]]]:
+        """Обратные индексы для слов заданной длины: {буква: слова} и {(позиция, буква): слова}"""
+        if length not in self._inverted:
+            by_letter = {}
+            by_position = {}
+            for word in self.words_of_length(length):
+                for pos, letter in enumerate(word):
+                    by_letter.setdefault(letter, set()).add(word)
+                    by_position.setdefault((pos, letter), set()).add(word)
+            self._inverted[length] = (by_letter, by_position)
+        return self._inverted[length]
+
+    def signature_table(self, length: int) -> Tuple[List[str], bytes]:
+        """Слова заданной длины и их векторы количества букв одним буфером (строятся один раз на длину)"""
+        if length not in self._signature_tables:
+            words = list(self.words_of_length(length))
+            self._signature_tables[length] = (words, letter_signatures(words, length))
+        return self._signature_tables[length]
+
+    @property
+    def sorted_words(self) -> List[str]:
+        """Отсортированный список слов - неявное префиксное дерево словаря"""
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self.words)
+        return self._sorted_words
+
+    def sorted_words_of_length(self, length: int) -> List[str]:
+        """Отсортированный список слов заданной длины (строится один раз на длину)"""
+        if length not in self._sorted_by_length:
+            self._sorted_by_length[length] = sorted(self.words_of_length(length))
+        return self._sorted_by_length[length]
+
+    def search(self, automaton, lengths: Optional[Iterable[int]] = None) -> List[str]:
+        """Обходит префиксное дерево словаря автоматом и возвращает принятые им слова.
+
+        Узел дерева - диапазон отсортированного списка с общим префиксом,
+        дочерние узлы находятся двоичным поиском. Ветви, где автомат
+        переходит в тупиковое состояние (None), не просматриваются.
+        Если заданы lengths, обходятся только деревья слов этих длин.
+        """
+        if lengths is None:
+            found = self._search_sorted(self.sorted_words, automaton)
+        else:
+            found = []
+            for length in lengths:
+                found.extend(self._search_sorted(self.sorted_words_of_length(length), automaton))
+        return sorted(found)
+
+    @staticmethod
+    def _search_sorted(words: List[str], automaton) -> List[str]:
+        """Обходит автоматом неявное префиксное дерево отсортированного списка слов"""
+        found = []
+        stack = [(0, len(words), '', automaton.start)] if words else []
+        while stack:
+            lo, hi, prefix, state = stack.pop()
+            depth = len(prefix)
+            if hi - lo == 1:
+                # Под узлом одно слово - дочитываем его автоматом без двоичного поиска
+                for letter in words[lo][depth:]:
+                    state = automaton.step(state, letter)
+                    if state is None:
+                        break
+                else:
+                    if automaton.accepts(state):
+                        found.append(words[lo])
+                continue
+            if words[lo] == prefix:
+                if automaton.accepts(state):
+                    found.append(prefix)
+                lo += 1
+            while lo < hi:
+                child = prefix + words[lo][depth]
+                end = bisect.bisect_right(words, child + '\U0010ffff', lo, hi)
+                next_state = automaton.step(state, child[-1])
+                if next_state is not None:
+                    stack.append((lo, end, child, next_state))
+                lo = end
+        return found
+
+    @property
+    def anagrams(self) -> Dict[str, List[str]]:
+        """Индекс {отсортированные буквы: слова из этих букв} (строится один раз)"""
+        if self._anagrams is None:
+            self._anagrams = {}
+            for word in sorted(self.words):
+                self._anagrams.setdefault(anagram_key(word), []).append(word)
+            self._anagram_keys = sorted(self._anagrams)
+        return self._anagrams
+
+    def find_anagrams(self, letters: str) -> List[str]:
+        """Возвращает слова, составленные ровно из данных букв"""
+        return list(self.anagrams.get(anagram_key(letters), []))
+
+    def find_sub_anagrams(self, letters: str, min_length: int = 1) -> List[str]:
+        """Возвращает слова, составленные из части данных букв (каждая буква - не больше раз, чем дана).
+
+        Подмультимножества букв обходятся в алфавитном порядке, поэтому
+        ключ строится как префикс; ветви, чей префикс не встречается ни
+        у одного ключа индекса (проверка двоичным поиском по отсортированным
+        ключам), отсекаются целиком.
+        """
+        anagrams = self.anagrams
+        keys = self._anagram_keys
+        available = sorted(Counter(letters).items())
+        found = []
+
+        def search(i: int, key: str):
+            position = bisect.bisect_left(keys, key)
+            if position == len(keys) or not keys[position].startswith(key):
+                return
+            if i == len(available):
+                if len(key) >= min_length:
+                    found.extend(anagrams.get(key, []))
+                return
+            letter, count = available[i]
+            for used in range(count + 1):
+                search(i + 1, key + letter * used)
+
+        search(0, '')
+        return sorted(found)
+
+class PatternAutomaton:
+    """Детерминированный автомат для шаблона слова.
+
+    Синтаксис: буква - сама буква, ? - любая буква, * - любое количество
+    любых букв, [ае] - одна из букв, [^ае] - любая, кроме перечисленных,
+    (x) - необязательный элемент x, например: ?р[ае]*в(ь).
+    Состояния строятся лениво как множества позиций в шаблоне.
+    """
+
+    def __init__(self, pattern: str):
+        self.elements = self._parse(pattern.strip().lower())
+        self._transitions = {}
+        self.start = self._closure({0})
+
+    @staticmethod
+    def _parse(pattern: str) -> List[Tuple[Optional[frozenset], bool, str]]:
+        """Разбирает шаблон в список (допустимые буквы или None, отрицание, вид: one/optional/star)"""
+        elements = []
+        i = 0
+        optional = False
+        while i < len(pattern):
+            char = pattern[i]
+            if char == '(' and not optional:
+                optional = True
+                i += 1
+                continue
+            if char == '*':
+                elements.append((None, False, 'star'))
+                i += 1
+                continue
+            if char == '?':
+                element = (None, False)
+                i += 1
+            elif char == '[':
+                end = pattern.find(']', i)
+                if end < 0:
+                    raise ValueError(f"Не закрыта скобка [ в шаблоне: {pattern}")
+                body = pattern[i + 1:end]
+                negated = body.startswith('^')
+                element = (frozenset(body[1:] if negated else body), negated)
+                i = end + 1
+            elif char in RUSSIAN_ALPHABET:
+                element = (frozenset(char), False)
+                i += 1
+            else:
+                raise ValueError(f"Неизвестный символ шаблона: {char}")
+
+            if optional:
+                if i >= len(pattern) or pattern[i] != ')':
+                    raise ValueError(f"Ожидалась ) после необязательного элемента: {pattern}")
+                i += 1
+                optional = False
+                elements.append(element + ('optional',))
+            else:
+                elements.append(element + ('one',))
+        if optional:
+            raise ValueError(f"Не закрыта скобка ( в шаблоне: {pattern}")
+        return elements
+
+    def _closure(self, positions) -> frozenset:
+        """Добавляет позиции, достижимые пропуском необязательных элементов и *"""
+        result = set(positions)
+        stack = list(positions)
+        while stack:
+            pos = stack.pop()
+            if pos < len(self.elements) and self.elements[pos][2] != 'one' and pos + 1 not in result:
+                result.add(pos + 1)
+                stack.append(pos + 1)
+        return frozenset(result)
+
+    def step(self, state: frozenset, letter: str) -> Optional[frozenset]:
+        """Переход по букве; None - тупиковое состояние"""
+        key = (state, letter)
+        if key not in self._transitions:
+            positions = set()
+            for pos in state:
+                if pos == len(self.elements):
+                    continue
+                letters, negated, kind = self.elements[pos]
+                if letters is None or (letter in letters) != negated:
+                    positions.add(pos if kind == 'star' else pos + 1)
+            self._transitions[key] = self._closure(positions) if positions else None
+        return self._transitions[key]
+
+    def accepts(self, state: frozenset) -> bool:
+        return len(self.elements) in state
+
+class LevenshteinAutomaton:
+    """Автомат Левенштейна для последовательности допустимых множеств букв.
+
+    Принимает слова, которые отличаются от шаблона (на каждой позиции -
+    множество допустимых букв) не более чем на max_edits вставок, удалений
+    и замен. Состояние - строка таблицы расстояний, обрезанная на
+    max_edits + 1; при substitutions_only - пара (позиция, число замен).
+    """
+
+    def __init__(self, classes: List[Set[str]], max_edits: int, substitutions_only: bool = False):
+        self.classes = classes
+        self.max_edits = max_edits
+        self.substitutions_only = substitutions_only
+        self._transitions = {}
+        if substitutions_only:
+            self.start = (0, 0)
+        else:
+            self.start = tuple(min(i, max_edits + 1) for i in range(len(classes) + 1))
+
+    def step(self, state: tuple, letter: str) -> Optional[tuple]:
+        """Переход по букве; None - расстояние уже заведомо больше max_edits"""
+        key = (state, letter)
+        if key not in self._transitions:
+            self._transitions[key] = self._step(state, letter)
+        return self._transitions[key]
+
+    def _step(self, state: tuple, letter: str) -> Optional[tuple]:
+        limit = self.max_edits + 1
+        if self.substitutions_only:
+            position, errors = state
+            if position == len(self.classes):
+                return None
+            errors += letter not in self.classes[position]
+            return (position + 1, errors) if errors < limit else None
+
+        row = [min(state[0] + 1, limit)]
+        for j, letters in enumerate(self.classes, 1):
+            cost = min(state[j] + 1, row[j - 1] + 1, state[j - 1] + (letter not in letters))
+            row.append(min(cost, limit))
+        return tuple(row) if min(row) < limit else None
+
+    def accepts(self, state: tuple) -> bool:
+        if self.substitutions_only:
+            return state[0] == len(self.classes)
+        return state[-1] <= self.max_edits
+
+def fuzzy_filter_words(index: WordIndex, conditions: dict) -> List[str]:
+    """Ищет слова, отличающиеся от позиционных условий не более чем на max_edits правок.
+
+    Ошибка в обязательной позиции тоже считается правкой:
+
+    >>> index = WordIndex({'крона', 'клена', 'кровь'})
+    >>> fuzzy_filter_words(index, make_conditions(positional_must={'р': [1]}, max_edits=1,
+    ...                                           substitutions_only=True))
+    ['клена', 'кровь', 'крона']
+    """
+    allowed, _ = compile_conditions(conditions)
+    automaton = LevenshteinAutomaton([set(letters) for letters in allowed], conditions['max_edits'],
+                                     conditions.get('substitutions_only', False))
+    # Обязательные буквы и их количество остаются строгими условиями, а буквы обязательных
+    # позиций - нет: они уже учтены автоматом и могут быть ошибкой
+    # (таких букв обычно одна-две, поэтому считаем их прямо в совпавших словах)
+    letter_bounds = [(RUSSIAN_ALPHABET[i], low, high) for i, low, high in
+                     signature_bounds(dict(conditions, forbidden_letters=set(), positional_must={}))]
+    # Длина слова меняется только вставками и удалениями, поэтому обходим лишь подходящие длины
+    word_length = len(allowed)
+    max_edits = 0 if automaton.substitutions_only else automaton.max_edits
+    lengths = range(max(1, word_length - max_edits), word_length + max_edits + 1)
+    return [word for word in index.search(automaton, lengths)
+            if all(low <= word.count(letter) <= high for letter, low, high in letter_bounds)]
+
+def find_by_pattern(index: WordIndex, pattern: str, conditions: Optional[dict] = None) -> List[str]:
+    """Ищет слова словаря любой длины по шаблону за один обход префиксного дерева"""
+    words = index.search(PatternAutomaton(pattern))
+    if conditions is None:
+        return words
+
+    # Совпадений немного, поэтому векторы считаем только для них, не для всего словаря
+    bounds = signature_bounds(conditions)
+    result = []
+    for word in words:
+        if not matches_signature(letter_signature(word), bounds) or not matches_positions(word, conditions):
+            continue
+        if conditions['only_nouns'] and not is_noun(word):
+            continue
+        if conditions['exclude_verbs'] and is_verb(word):
+            continue
+        result.append(word)
+    return result
+
+def anagram_key(letters: str) -> str:
+    """Ключ анаграммы - буквы слова в алфавитном порядке"""
+    return ''.join(sorted(letters))
+
+def matches_positions(word: str, conditions: dict) -> bool:
+    """Проверяет обязательные и запрещенные позиции букв"""
+    for letter, positions in conditions['positional_must'].items():
+        if any(pos >= len(word) or word[pos] != letter for pos in positions):
+            return False
+    for letter, positions in conditions['positional_forbidden'].items():
+        if any(pos < len(word) and word[pos] == letter for pos in positions):
+            return False
+    return True
+
+def find_anagrams(index: WordIndex, letters: str, conditions: Optional[dict] = None,
+                  partial: bool = False, min_length: int = 1) -> List[str]:
+    """Ищет анаграммы (partial=True - слова из части букв) с позиционными фильтрами и фильтром частей речи"""
+    letters = letters.lower().replace(',', '').replace(' ', '')
+    words = index.find_sub_anagrams(letters, min_length) if partial else index.find_anagrams(letters)
+    if conditions is None:
+        return words
+
+    result = []
+    for word in words:
+        if not matches_positions(word, conditions):
+            continue
+        if conditions['only_nouns'] and not is_noun(word):
+            continue
+        if conditions['exclude_verbs'] and is_verb(word):
+            continue
+        result.append(word)
+    return result
+
+def letter_frequencies(words: Set[str]) -> Dict[str, float]:
+    """Считает относительную частоту букв в словаре"""
+    counts = {}
+    for word in words:
+        for letter in word:
+            counts[letter] = counts.get(letter, 0) + 1
+    total = sum(counts.values()) or 1
+    return {letter: count / total for letter, count in counts.items()}
+
+def bigram_frequencies(words: Set[str]) -> Dict[str, float]:
+    """Считает относительную частоту биграмм в словаре ('^' обозначает начало слова)"""
+    counts = {}
+    for word in words:
+        prev = '^'
+        for letter in word:
+            counts[prev + letter] = counts.get(prev + letter, 0) + 1
+            prev = letter
+    total = sum(counts.values()) or 1
+    return {bigram: count / total for bigram, count in counts.items()}
+
+def _count_tracker(counts: Dict[str, Tuple[int, Optional[int]]]):
+    """Возвращает начальное состояние счетчиков букв, функцию перехода и проверку дефицита.
+
+    Состояние - кортеж встреченных количеств для букв с ограничениями,
+    обрезанных сверху: большие значения уже не влияют на результат.
+    """
+    letters = sorted(counts)
+    index = {letter: i for i, letter in enumerate(letters)}
+    lows = [counts[letter][0] for letter in letters]
+    highs = [counts[letter][1] for letter in letters]
+    caps = [low if high is None else high for low, high in zip(lows, highs)]
+
+    def advance(state: Tuple[int, ...], letter: str) -> Optional[Tuple[int, ...]]:
+        i = index.get(letter)
+        if i is None:
+            return state
+        value = state[i] + 1
+        if highs[i] is not None and value > highs[i]:
+            return None
+        return state[:i] + (min(value, caps[i]),) + state[i + 1:]
+
+    def deficit(state: Tuple[int, ...]) -> int:
+        return sum(max(0, low - value) for low, value in zip(lows, state))
+
+    return (0,) * len(letters), advance, deficit
+
+def _completion_weights(allowed: List[List[str]], counts: Dict[str, Tuple[int, Optional[int]]],
+                        weight: Callable[[Optional[str], str], float], uses_prev: bool):
+    """Возвращает функцию суммарного веса всех допустимых продолжений слова.
+
+    Состояние продолжения - позиция, счетчики букв с ограничениями
+    количества и (для биграммных весов) предыдущая буква. Значения
+    запоминаются, поэтому таблица строится без перебора слов.
+    """
+    start, advance, deficit = _count_tracker(counts)
+    memo = {}
+
+    def total(position: int, state: Tuple[int, ...], prev: Optional[str]):
+        if deficit(state) > len(allowed) - position:
+            return 0
+        if position == len(allowed):
+            return 1
+        key = (position, state, prev)
+        if key not in memo:
+            result = 0
+            for letter in allowed[position]:
+                next_state = advance(state, letter)
+                if next_state is not None:
+                    result += weight(prev, letter) * total(position + 1, next_state,
+                                                           letter if uses_prev else None)
+            memo[key] = result
+        return memo[key]
+
+    return total, start, advance
+
+def count_possible_words(conditions: dict) -> int:
+    """Считает количество комбинаций по условиям без их генерации"""
+    allowed, counts = compile_conditions(conditions)
+    total, start, _ = _completion_weights(allowed, counts, lambda prev, letter: 1, False)
+    return total(0, start, None)
+
+def sample_possible_words(conditions: dict, n: int, seed: Optional[int] = None,
+                          letter_weights: Optional[Dict[str, float]] = None,
+                          bigram_weights: Optional[Dict[str, float]] = None,
+                          unique: bool = True) -> List[str]:
+    """Выбирает n случайных комбинаций по условиям без полного перебора.
+
+    По умолчанию выборка равномерная; letter_weights задает веса букв,
+    bigram_weights - веса пар букв (ключ '^x' - вес первой буквы x).
+    Каждое слово строится за время, пропорциональное его длине.
+    """
+    allowed, counts = compile_conditions(conditions)
+
+    if bigram_weights is not None:
+        def weight(prev, letter):
+            return bigram_weights.get((prev or '^') + letter, 0.0) + SAMPLE_WEIGHT_SMOOTHING
+    elif letter_weights is not None:
+        def weight(prev, letter):
+            return letter_weights.get(letter, 0.0) + SAMPLE_WEIGHT_SMOOTHING
+    else:
+        def weight(prev, letter):
+            return 1
+
+    uses_prev = bigram_weights is not None
+    total, start, advance = _completion_weights(allowed, counts, weight, uses_prev)
+    if not total(0, start, None):
+        return []
+
+    rng = random.Random(seed)
+
+    def draw() -> str:
+        word = []
+        state = start
+        prev = None
+        for position, letters in enumerate(allowed):
+            current = total(position, state, prev)
+            # Для целых весов выбираем точно, чтобы не терять равномерность на больших числах
+            threshold = rng.randrange(current) if isinstance(current, int) else rng.random() * current
+            chosen = None
+            for letter in letters:
+                next_state = advance(state, letter)
+                if next_state is None:
+                    continue
+                next_prev = letter if uses_prev else None
+                part = weight(prev, letter) * total(position + 1, next_state, next_prev)
+                if part <= 0:
+                    continue
+                chosen = (letter, next_state, next_prev)
+                if threshold < part:
+                    break
+                threshold -= part
+            letter, state, prev = chosen
+            word.append(letter)
+        return ''.join(word)
+
+    if not unique:
+        return [draw() for _ in range(n)]
+
+    n = min(n, count_possible_words(conditions))
+    samples = []
+    seen = set()
+    attempts = 0
+    # Для сильно неравномерных весов повторы неизбежны, поэтому ограничиваем число попыток
+    while len(samples) < n and attempts < n * 20 + 100:
+        attempts += 1
+        word = draw()
+        if word not in seen:
+            seen.add(word)
+            samples.append(word)
+    return samples
+
+def dictionary_fingerprint(words: Set[str]) -> str:
+    """Возвращает отпечаток словаря, меняющийся при любом изменении набора слов"""
+    digest = hashlib.sha256()
+    for word in sorted(words):
+        digest.update(word.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+class NgramModel:
+    """Буквенная триграммная модель с интерполяцией биграмм и униграмм.
+
+    Начало слова дополняется символами '^', конец обозначается '$'.
+    """
+    LAMBDAS = (0.6, 0.3, 0.1)  # веса триграмм, биграмм и униграмм
+
+    def __init__(self, counts: Dict[str, int], fingerprint: str = ''):
+        self.counts = counts
+        self.fingerprint = fingerprint
+        self.context_counts = {}
+        for ngram, count in counts.items():
+            if len(ngram) > 1:
+                context = ngram[:-1]
+                self.context_counts[context] = self.context_counts.get(context, 0) + count
+        self.total_unigrams = sum(count for ngram, count in counts.items() if len(ngram) == 1)
+        self.vocabulary_size = len(RUSSIAN_ALPHABET) + 1  # буквы и конец слова
+        self._log_prob_cache = {}
+
+    @classmethod
+    def train(cls, words: Set[str]) -> 'NgramModel':
+        """Обучает модель на словах словаря"""
+        counts = {}
+        for word in words:
+            padded = '^^' + word + '$'
+            for i in range(2, len(padded)):
+                for ngram in (padded[i], padded[i - 1:i + 1], padded[i - 2:i + 1]):
+                    counts[ngram] = counts.get(ngram, 0) + 1
+        return cls(counts, dictionary_fingerprint(words))
+
+    def save(self, filename: str):
+        """Сохраняет модель в файл"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'counts': self.counts}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, filename: str) -> 'NgramModel':
+        """Загружает модель из файла"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['counts'], data['fingerprint'])
+
+    def log_prob(self, context: str, letter: str) -> float:
+        """Логарифм вероятности буквы после двухбуквенного контекста"""
+        key = context + letter
+        if key not in self._log_prob_cache:
+            l3, l2, l1 = self.LAMBDAS
+            prob = l1 * (self.counts.get(letter, 0) + 1) / (self.total_unigrams + self.vocabulary_size)
+            if self.context_counts.get(context[1]):
+                prob += l2 * self.counts.get(context[1] + letter, 0) / self.context_counts[context[1]]
+            if self.context_counts.get(context):
+                prob += l3 * self.counts.get(key, 0) / self.context_counts[context]
+            self._log_prob_cache[key] = math.log(prob)
+        return self._log_prob_cache[key]
+
+    def score(self, word: str) -> float:
+        """Логарифм правдоподобия слова целиком"""
+        padded = '^^' + word + '$'
+        return sum(self.log_prob(padded[i - 2:i], padded[i]) for i in range(2, len(padded)))
+
+def load_ngram_model(words: Set[str], filename: str = NGRAM_MODEL_FILE) -> NgramModel:
+    """Загружает модель из кэша на диске или обучает заново, если словарь изменился"""
+    fingerprint = dictionary_fingerprint(words)
+    if os.path.exists(filename):
+        try:
+            model = NgramModel.load(filename)
+            if model.fingerprint == fingerprint:
+                return model
+        except (OSError, ValueError, KeyError):
+            pass
+
+    model = NgramModel.train(words)
+    try:
+        model.save(filename)
+    except OSError:
+        pass
+    return model
+
+def top_k_possible_words(conditions: dict, model: NgramModel, k: int) -> List[Tuple[str, float]]:
+    """Находит k самых правдоподобных комбинаций по условиям.
+
+    Комбинации оцениваются прямо во время обхода, лучшие k хранятся в куче,
+    а префиксы, которые даже с наилучшим продолжением не попадут в топ,
+    отсекаются без перебора их продолжений.
+    """
+    allowed, counts = compile_conditions(conditions)
+    word_length = len(allowed)
+    if k <= 0 or any(not letters for letters in allowed):
+        return []
+
+    def contexts(position: int) -> List[str]:
+        first = allowed[position - 2] if position >= 2 else ['^']
+        second = allowed[position - 1] if position >= 1 else ['^']
+        return [a + b for a in first for b in second]
+
+    # best_rest[i] - верхняя оценка суммы логарифмов для позиций i..конец
+    best_rest = [0.0] * (word_length + 1)
+    best_rest[word_length] = max(model.log_prob(context, '$') for context in contexts(word_length))
+    for position in range(word_length - 1, -1, -1):
+        best_step = max(model.log_prob(context, letter)
+                        for context in contexts(position) for letter in allowed[position])
+        best_rest[position] = best_rest[position + 1] + best_step
+
+    start, advance, deficit = _count_tracker(counts)
+    heap = []
+
+    def search(prefix: str, score: float, state: Tuple[int, ...]):
+        position = len(prefix)
+        if len(heap) == k and score + best_rest[position] <= heap[0][0]:
+            return
+        if deficit(state) > word_length - position:
+            return
+        context = ('^^' + prefix)[-2:]
+        if position == word_length:
+            total = score + model.log_prob(context, '$')
+            if len(heap) < k:
+                heapq.heappush(heap, (total, prefix))
+            elif total > heap[0][0]:
+                heapq.heapreplace(heap, (total, prefix))
+            return
+        # Сначала пробуем самые вероятные буквы, чтобы порог кучи рос быстрее
+        steps = sorted(((model.log_prob(context, letter), letter) for letter in allowed[position]),
+                       reverse=True)
+        for step, letter in steps:
+            next_state = advance(state, letter)
+            if next_state is not None:
+                search(prefix + letter, score + step, next_state)
+
+    search('', 0.0, start)
+    return [(word, score) for score, word in sorted(heap, reverse=True)]
+
+def stage_key(*parts) -> bytes:
+    """Отпечаток входных данных этапа (множества учитываются в отсортированном виде)"""
+    data = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=sorted)
+    return hashlib.sha256(data.encode('utf-8')).digest()
+
+def dictionary_sources_fingerprint(sources: List[str]) -> Optional[list]:
+    """Описывает версии источников без их загрузки; None - версию удаленного словаря узнать не удалось"""
+    versions = []
+    for location in sources:
+        if location.startswith(('http://', 'https://')):
+            try:
+                response = requests.head(location, timeout=10, allow_redirects=True)
+            except Exception:
+                return None
+            headers = [response.headers.get(name) for name in ('ETag', 'Last-Modified', 'Content-Length')]
+            if response.status_code != 200 or not any(headers):
+                return None
+            versions.append([location] + headers)
+        else:
+            try:
+                info = os.stat(location)
+            except OSError:
+                return None
+            versions.append([location, info.st_size, info.st_mtime_ns])
+    return versions
+
+def load_snapshot(filename: str = SNAPSHOT_FILE) -> Dict[str, Tuple[bytes, List[str]]]:
+    """Читает снимок результатов: {этап: (отпечаток входных данных, слова)}"""
+    stages = {}
+    try:
+        with open(filename, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return stages
+    if not data.startswith(SNAPSHOT_MAGIC):
+        return stages
+
+    offset = len(SNAPSHOT_MAGIC)
+    try:
+        while offset < len(data):
+            name_length, = struct.unpack_from('>B', data, offset)
+            offset += 1
+            name = data[offset:offset + name_length].decode('utf-8')
+            offset += name_length
+            key = data[offset:offset + 32]
+            offset += 32
+            payload_length, = struct.unpack_from('>I', data, offset)
+            offset += 4
+            text = zlib.decompress(data[offset:offset + payload_length]).decode('utf-8')
+            offset += payload_length
+            stages[name] = (key, text.split('\n') if text else [])
+    except (struct.error, zlib.error, UnicodeDecodeError):
+        # Поврежденный снимок просто пересчитываем
+        return {}
+    return stages
+
+def save_snapshot(stages: Dict[str, Tuple[bytes, List[str]]], filename: str = SNAPSHOT_FILE):
+    """Сохраняет снимок результатов: для каждого этапа - отпечаток и сжатый список слов"""
+    with open(filename, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        for name, (key, words) in stages.items():
+            encoded_name = name.encode('utf-8')
+            payload = zlib.compress('\n'.join(words).encode('utf-8'), 9)
+            f.write(struct.pack('>B', len(encoded_name)) + encoded_name + key)
+            f.write(struct.pack('>I', len(payload)) + payload)
+
+def run_stage(snapshot: dict, stages: dict, name: str, key: bytes, compute: Callable[[], List[str]]):
+    """Берет результат этапа из снимка, если его входные данные не изменились, иначе вычисляет заново.
+
+    Возвращает (слова, пересчитан ли этап).
+    """
+    if name in snapshot and snapshot[name][0] == key:
+        stages[name] = snapshot[name]
+        return snapshot[name][1], False
+    words = compute()
+    stages[name] = (key, words)
+    return words, True
+
+def save_words_to_file(words: Iterable[str], filename: str, title: str, count: Optional[int] = None):
+    """Сохраняет список слов в файл (слова можно передавать потоком)"""
+    if count is None and hasattr(words, '__len__'):
+        count = len(words)
+    
+    if count is None:
+        # Количество заранее неизвестно: сначала пишем слова во временный файл, затем заголовок
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as body:
+            count = write_numbered_words(body, words)
+            body.seek(0)
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(f"{title}\n")
+                f.write("=" * 50 + "\n")
+                f.write(f"Всего найдено: {count}\n")
+                f.write("=" * 50 + "\n\n")
+                shutil.copyfileobj(body, f)
+    else:
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(f"{title}\n")
+            f.write("=" * 50 + "\n")
+            f.write(f"Всего найдено: {count}\n")
+            f.write("=" * 50 + "\n\n")
+            
+            write_numbered_words(f, words)
     
     print(f"💾 Сохранено в файл: {filename}")
 
-def main():
+def write_numbered_words(f, words: Iterable[str]) -> int:
+    """Пишет слова строками вида "   1. слово" и возвращает их количество (WordList - пачками)"""
+    if isinstance(words, WordList):
+        return words.write_numbered(f)
+    count = 0
+    for count, word in enumerate(words, 1):
+        f.write(f"{count:4d}. {word}\n")
+    return count
+
+def read_words_file(filename: str) -> Iterator[str]:
+    """Построчно читает слова из файла, сохраненного save_words_to_file (или просто по слову в строке)"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        head = list(islice(f, 2))
+        if len(head) == 2 and head[1].strip() == "=" * 50:
+            # Файл с заголовком save_words_to_file: слова только в нумерованных строках
+            pattern = _NUMBERED_WORD_LINE
+        else:
+            pattern = _PLAIN_WORD_LINE
+        for line in chain(head, f):
+            match = pattern.match(line)
+            if match:
+                yield match.group(1)
+
+def merge_sorted_words(streams: List[Iterable[str]]) -> Iterator[str]:
+    """Сливает отсортированные потоки слов в один отсортированный поток без повторов"""
+    previous = None
+    for word in heapq.merge(*streams):
+        if word != previous:
+            yield word
+            previous = word
+
+def external_sort_words(words: Iterable[str], run_size: int = 500000,
+                        tmpdir: Optional[str] = None) -> Iterator[str]:
+    """Сортирует поток слов без повторов, сбрасывая отсортированные серии во временные файлы.
+
+    В памяти одновременно находится не больше run_size слов, а серии
+    затем сливаются k-путевым слиянием.
+    """
+    runs = []
+    try:
+        words = iter(words)
+        while True:
+            run = sorted(set(islice(words, run_size)))
+            if not run:
+                break
+            spill = tempfile.TemporaryFile('w+', encoding='utf-8', dir=tmpdir)
+            spill.writelines(word + '\n' for word in run)
+            spill.seek(0)
+            runs.append(spill)
+        yield from merge_sorted_words([(line.rstrip('\n') for line in run) for run in runs])
+    finally:
+        for run in runs:
+            run.close()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(description="Генератор слов по условиям")
+    parser.add_argument('--sample', type=int, default=0, metavar='N',
+                        help="вывести N случайных комбинаций вместо полного перебора")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="зерно генератора случайных чисел для --sample")
+    parser.add_argument('--weights', choices=['uniform', 'letters', 'bigrams'], default='uniform',
+                        help="распределение выборки: равномерное, по частоте букв или биграмм словаря")
+    parser.add_argument('--top', type=int, default=0, metavar='K',
+                        help="вывести K самых правдоподобных комбинаций по n-граммной модели словаря")
+    parser.add_argument('--anagram', metavar='БУКВЫ',
+                        help="найти в словаре слова, составленные из этих букв")
+    parser.add_argument('--sub', action='store_true',
+                        help="для --anagram: разрешить использовать только часть букв")
+    parser.add_argument('--pattern', metavar='ШАБЛОН',
+                        help="найти в словаре слова по шаблону, например: ?р[ае]*в(ь)")
+    parser.add_argument('--fuzzy', type=int, default=0, metavar='K',
+                        help="допускать до K правок в позиционных условиях и запрещенных буквах")
+    parser.add_argument('--substitutions-only', action='store_true',
+                        help="для --fuzzy: учитывать только замены букв, без вставок и удалений")
+    parser.add_argument('--nouns', action='store_true',
+                        help="для --anagram и --pattern: только существительные и не глаголы")
+    parser.add_argument('--dict', action='append', metavar='ИСТОЧНИК',
+                        help="словарь: URL, файл или архив .gz/.bz2 (можно указать несколько раз)")
+    parser.add_argument('--source', action='append', metavar='ИМЯ',
+                        help="использовать только слова из источника с этим именем файла")
+    parser.add_argument('--fold-yo', action='store_true', help="заменять ё на е при загрузке словаря")
+    parser.add_argument('--large', action='store_true',
+                        help="не держать все комбинации в памяти: писать их в файл потоком")
+    parser.add_argument('--merge', nargs='+', metavar='ФАЙЛ',
+                        help="слить файлы со словами в один отсортированный список без повторов")
+    parser.add_argument('--output', default="объединенные_слова.txt",
+                        help="файл результата для --merge")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="не использовать снимок результатов прошлого запуска и пересчитать все")
+    return parser.parse_args(argv)
+
+def load_cli_dictionary(args: argparse.Namespace, word_length: Optional[int] = 5) -> WordIndex:
+    """Загружает словари из аргументов командной строки и оставляет выбранные источники"""
+    index = load_dictionary_index(args.dict, word_length, args.fold_yo)
+    if args.source:
+        index = index.restrict(args.source)
+    return index
+
+def print_samples(args: argparse.Namespace):
+    """Выводит случайную выборку комбинаций по условиям"""
+    letter_weights = None
+    bigram_weights = None
+    if args.weights != 'uniform':
+        print("📚 Загружаем русский словарь для весов...")
+        dictionary_words = load_cli_dictionary(args)
+        if args.weights == 'letters':
+            letter_weights = letter_frequencies(dictionary_words)
+        else:
+            bigram_weights = bigram_frequencies(dictionary_words)
+
+    print(f"🔢 Всего возможных комбинаций: {count_possible_words(DEFAULT_CONDITIONS)}")
+    samples = sample_possible_words(DEFAULT_CONDITIONS, args.sample, seed=args.seed,
+                                    letter_weights=letter_weights, bigram_weights=bigram_weights)
+    print(f"🎲 Случайные комбинации ({len(samples)}):")
+    for i, word in enumerate(samples, 1):
+        print(f"{i:2d}. {word}")
+
+def print_top_words(args: argparse.Namespace):
+    """Выводит самые правдоподобные комбинации по условиям"""
+    print("📚 Загружаем русский словарь...")
+    dictionary_words = load_cli_dictionary(args)
+    model = load_ngram_model(dictionary_words)
+
+    print(f"🏆 Топ-{args.top} правдоподобных комбинаций:")
+    for i, (word, score) in enumerate(top_k_possible_words(DEFAULT_CONDITIONS, model, args.top), 1):
+        print(f"{i:2d}. {word} ({score:.2f})")
+
+def print_anagrams(args: argparse.Namespace):
+    """Выводит анаграммы заданных букв из словаря"""
+    print("📚 Загружаем русский словарь...")
+    index = load_cli_dictionary(args, None)
+    conditions = make_conditions(only_nouns=True, exclude_verbs=True) if args.nouns else None
+
+    words = find_anagrams(index, args.anagram, conditions, partial=args.sub, min_length=2)
+    print(f"🔤 Найдено {len(words)} слов из букв «{args.anagram}»:")
+    for i, word in enumerate(words, 1):
+        print(f"{i:2d}. {word}")
+
+def print_pattern_matches(args: argparse.Namespace):
+    """Выводит слова словаря, подходящие под шаблон"""
+    print("📚 Загружаем русский словарь...")
+    index = load_cli_dictionary(args, None)
+    conditions = make_conditions(only_nouns=True, exclude_verbs=True) if args.nouns else None
+
+    words = find_by_pattern(index, args.pattern, conditions)
+    print(f"🔎 Найдено {len(words)} слов по шаблону «{args.pattern}»:")
+    for i, word in enumerate(words, 1):
+        print(f"{i:2d}. {word}")
+
+def merge_word_files(args: argparse.Namespace):
+    """Сливает файлы со словами в один отсортированный файл без повторов"""
+    words = external_sort_words(word for filename in args.merge for word in read_words_file(filename))
+    save_words_to_file(words, args.output, "Объединенные слова из файлов: " + ", ".join(args.merge))
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.merge:
+        merge_word_files(args)
+        return
+    if args.pattern:
+        print_pattern_matches(args)
+        return
+    if args.anagram:
+        print_anagrams(args)
+        return
+    if args.top > 0:
+        print_top_words(args)
+        return
+    if args.sample > 0:
+        print_samples(args)
+        return
+
     print("🎯 Генератор слов по условиям")
     print("=" * 50)
     print("Условия:")
@@ -247,20 +1620,50 @@ def main():
     print("- Слово НЕ может быть глаголом")
     print("=" * 50)
     
+    # Этапы, входные данные которых не изменились с прошлого запуска, берем из снимка
+    snapshot = {} if args.no_snapshot else load_snapshot()
+    stages = {}
+    
     # Получаем словарь
     print("📚 Загружаем русский словарь...")
-    dictionary_words = get_russian_words()
-    print(f"Загружено {len(dictionary_words)} слов из словаря")
+    sources_version = dictionary_sources_fingerprint(args.dict or DICTIONARY_SOURCES)
+    if sources_version is None:
+        # Версию словаря не узнать без загрузки - загружаем, а дальше сравниваем по содержимому
+        dictionary_key = stage_key('загрузка', time.time())
+    else:
+        dictionary_key = stage_key(sources_version, args.source, args.fold_yo)
+    loaded = []
+    
+    def load_words():
+        index = load_cli_dictionary(args)
+        loaded.append(index)
+        return sorted(index.words)
+    
+    words, changed = run_stage(snapshot, stages, 'dictionary', dictionary_key, load_words)
+    if loaded and loaded[0].source_names == [FALLBACK_SOURCE]:
+        # Словарь не загрузился: базовый список не сохраняем в снимок под версией настоящего словаря
+        del stages['dictionary']
+    dictionary_words = loaded[0] if loaded else WordIndex(words)
+    print(f"Загружено {len(dictionary_words)} слов из словаря" + ("" if changed else " (из снимка)"))
+    if len(dictionary_words.source_names) > 1:
+        for name in dictionary_words.source_names:
+            print(f"- {name}: {len(dictionary_words.restrict([name]))}")
+    dictionary_version = dictionary_fingerprint(dictionary_words.words)
     
     # Фильтруем слова по условиям
     print("\n🔍 Фильтруем слова по условиям...")
-    filtered_words = filter_words_by_conditions(dictionary_words)
+    conditions = dict(DEFAULT_CONDITIONS, max_edits=args.fuzzy,
+                      substitutions_only=args.substitutions_only)
+    filtered_words, filtered_changed = run_stage(
+        snapshot, stages, 'filtered_words', stage_key(dictionary_version, conditions),
+        lambda: filter_words_by_conditions(dictionary_words, conditions))
     
-    print(f"\n✅ Найдено {len(filtered_words)} слов из словаря")
+    print(f"\n✅ Найдено {len(filtered_words)} слов из словаря" + ("" if filtered_changed else " (из снимка)"))
     
     # Сохраняем слова из словаря
     if filtered_words:
-        save_words_to_file(filtered_words, "слова_из_словаря.txt", "Слова из словаря, соответствующие условиям")
+        if filtered_changed or not os.path.exists("слова_из_словаря.txt"):
+            save_words_to_file(filtered_words, "слова_из_словаря.txt", "Слова из словаря, соответствующие условиям")
         print("Первые 20 слов:")
         for i, word in enumerate(filtered_words[:20], 1):
             print(f"{i:2d}. {word}")
@@ -271,28 +1674,45 @@ def main():
     
     # Генерируем все возможные комбинации
     print("\n🎲 Генерируем все возможные комбинации...")
-    possible_combinations = generate_possible_words()
+    combinations_key = stage_key(DEFAULT_CONDITIONS)
+    if args.large:
+        # Комбинации не собираются в список: они идут потоком в алфавитном порядке
+        total_combinations = count_possible_words(DEFAULT_CONDITIONS)
+        first_combinations = list(islice(iter_possible_words(DEFAULT_CONDITIONS), 20))
+        combinations_changed = True
+    else:
+        possible_combinations, combinations_changed = run_stage(
+            snapshot, stages, 'possible_combinations', combinations_key, generate_possible_words)
+        total_combinations = len(possible_combinations)
+        first_combinations = possible_combinations[:20]
     
-    print(f"\n🔢 Всего возможных комбинаций: {len(possible_combinations)}")
+    print(f"\n🔢 Всего возможных комбинаций: {total_combinations}")
     print("Первые 20 комбинаций:")
-    for i, word in enumerate(possible_combinations[:20], 1):
+    for i, word in enumerate(first_combinations, 1):
         print(f"{i:2d}. {word}")
     
-    if len(possible_combinations) > 20:
-        print(f"... и еще {len(possible_combinations) - 20} комбинаций")
+    if total_combinations > 20:
+        print(f"... и еще {total_combinations - 20} комбинаций")
     
     # Сохраняем все комбинации
-    save_words_to_file(possible_combinations, "все_комбинации.txt", "Все возможные комбинации букв")
+    if combinations_changed or not os.path.exists("все_комбинации.txt"):
+        combinations = iter_possible_words(DEFAULT_CONDITIONS) if args.large else possible_combinations
+        save_words_to_file(combinations, "все_комбинации.txt", "Все возможные комбинации букв",
+                           count=total_combinations)
     
     # Проверяем, какие из сгенерированных комбинаций есть в словаре и являются существительными
     print("\n📖 Проверяем, какие комбинации есть в словаре и являются существительными...")
-    real_nouns = [word for word in possible_combinations if word in dictionary_words and is_noun(word)]
+    real_nouns, nouns_changed = run_stage(
+        snapshot, stages, 'real_nouns', stage_key(dictionary_version, combinations_key.hex()),
+        lambda: [word for word in (iter_possible_words(DEFAULT_CONDITIONS) if args.large else possible_combinations)
+                 if word in dictionary_words and is_noun(word)])
     
     print(f"\n📚 Найдено {len(real_nouns)} реальных существительных")
     
     # Сохраняем реальные существительные
     if real_nouns:
-        save_words_to_file(real_nouns, "реальные_существительные.txt", "Реальные существительные из комбинаций")
+        if nouns_changed or not os.path.exists("реальные_существительные.txt"):
+            save_words_to_file(real_nouns, "реальные_существительные.txt", "Реальные существительные из комбинаций")
         print("Первые 20 существительных:")
         for i, word in enumerate(real_nouns[:20], 1):
             print(f"{i:2d}. {word}")
@@ -301,6 +1721,8 @@ def main():
     else:
         print("Реальных существительных не найдено")
     
+    save_snapshot(stages)
+    
     print("\n🎉 Готово! Все результаты сохранены в файлы:")
     print("- слова_из_словаря.txt")
     print("- все_комбинации.txt") 
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+from itertools import islice
+from typing import List, Set, Dict, Optional, AsyncIterator
+
+try:
+    import aiohttp
+except ImportError:
+    # Без aiohttp удаленные словари загружаются синхронным загрузчиком в пуле потоков
+    aiohttp = None
+
+from word_generator import (DICTIONARY_SOURCES, WordIndex, add_dictionary_lines, read_dictionary_source,
+                            source_names, merge_dictionaries, fallback_index, filter_words_by_conditions,
+                            find_by_pattern, iter_possible_words, sample_possible_words,
+                            load_ngram_model, top_k_possible_words, is_noun, WordList)
+
+# Сколько строк удаленного словаря разбирать в пуле потоков за раз
+LINES_PER_BATCH = 20000
+
+def run_query(index: WordIndex, conditions: dict) -> dict:
+    """Выполняет запрос по условиям синхронно; результат - как у WordGeneratorThread"""
+    if conditions.get('pattern'):
+        filtered_words = find_by_pattern(index, conditions['pattern'], conditions)
+    else:
+        filtered_words = filter_words_by_conditions(index, conditions)
+
+    if conditions.get('top_k'):
+        model = load_ngram_model(index.words)
+        possible_combinations = [word for word, score in
+                                 top_k_possible_words(conditions, model, conditions['top_k'])]
+    elif conditions.get('sample_size'):
+        possible_combinations = sample_possible_words(conditions, conditions['sample_size'],
+                                                      seed=conditions.get('sample_seed'))
+    else:
+        possible_combinations = WordList.from_words(iter_possible_words(conditions), conditions['word_length'])
+
+    if isinstance(possible_combinations, WordList):
+        # Идем по словарю и ищем слова в упакованном списке, не создавая строки всех комбинаций
+        real_nouns = sorted(word for word in index.words_of_length(conditions['word_length'])
+                            if word in possible_combinations and is_noun(word))
+    else:
+        real_nouns = [word for word in possible_combinations if word in index and is_noun(word)]
+    return {
+        'dictionary_words': len(index),
+        'filtered_words': filtered_words,
+        'possible_combinations': possible_combinations,
+        'real_nouns': real_nouns
+    }
+
+
+class AsyncWordEngine:
+    """Асинхронный интерфейс генератора для встраивания в asyncio-приложения.
+
+    Тяжелые по процессору этапы выполняются в пуле потоков, удаленные
+    словари скачиваются через aiohttp (если установлен), а число
+    одновременно выполняемых запросов ограничено max_concurrency.
+
+        engine = AsyncWordEngine()
+        results = await engine.query(conditions)
+        async for batch in engine.stream(conditions):
+            ...
+    """
+
+    def __init__(self, sources: Optional[List[str]] = None, fold_yo: bool = False,
+                 max_concurrency: int = 4, executor=None):
+        self.sources = list(sources or DICTIONARY_SOURCES)
+        self.fold_yo = fold_yo
+        self.executor = executor  # None - пул потоков цикла событий по умолчанию
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._indexes = {}  # {длина слова: WordIndex}
+        self._load_locks = {}
+
+    async def _run(self, func, *args):
+        """Выполняет функцию в пуле потоков, не блокируя цикл событий"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def _fetch_remote(self, session, url: str, word_length: Optional[int]) -> Dict[int, Set[str]]:
+        """Скачивает удаленный словарь потоково и разбирает строки пачками в пуле потоков"""
+        buckets = {}
+        batch = []
+        async with session.get(url) as response:
+            response.raise_for_status()
+            async for raw in response.content:
+                batch.append(raw)
+                if len(batch) >= LINES_PER_BATCH:
+                    await self._run(add_dictionary_lines, buckets, batch, word_length, self.fold_yo)
+                    batch = []
+        await self._run(add_dictionary_lines, buckets, batch, word_length, self.fold_yo)
+        return buckets
+
+    async def _load_source(self, session, location: str, word_length: Optional[int]) -> Dict[int, Set[str]]:
+        if session is not None and location.startswith(('http://', 'https://')):
+            return await self._fetch_remote(session, location, word_length)
+        return await self._run(read_dictionary_source, location, word_length, self.fold_yo)
+
+    async def load(self, word_length: Optional[int] = 5) -> WordIndex:
+        """Загружает словари один раз; одновременные запросы дожидаются одной загрузки"""
+        if word_length in self._indexes:
+            return self._indexes[word_length]
+
+        lock = self._load_locks.setdefault(word_length, asyncio.Lock())
+        async with lock:
+            if word_length in self._indexes:
+                return self._indexes[word_length]
+
+            if aiohttp is not None:
+                timeout = aiohttp.ClientTimeout(total=60)
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    results = await asyncio.gather(
+                        *(self._load_source(session, location, word_length) for location in self.sources),
+                        return_exceptions=True)
+            else:
+                results = await asyncio.gather(
+                    *(self._load_source(None, location, word_length) for location in self.sources),
+                    return_exceptions=True)
+
+            for location, result in zip(self.sources, results):
+                if isinstance(result, Exception):
+                    print(f"⚠️ Не удалось загрузить словарь {location}: {result}")
+            results = [None if isinstance(result, Exception) else result for result in results]
+            index = await self._run(merge_dictionaries, source_names(self.sources), results)
+            if not index.words:
+                # Если не удалось загрузить, используем базовый список слов
+                index = fallback_index()
+            self._indexes[word_length] = index
+            return index
+
+    async def query(self, conditions: dict) -> dict:
+        """Выполняет запрос по условиям; результат - как у WordGeneratorThread"""
+        word_length = None if conditions.get('pattern') else conditions['word_length']
+        index = await self.load(word_length)
+        async with self._semaphore:
+            if conditions.get('sources'):
+                # Отбор по источникам проходит по всему словарю, поэтому тоже выполняется в пуле потоков
+                index = await self._run(index.restrict, conditions['sources'])
+            return await self._run(run_query, index, conditions)
+
+    async def stream(self, conditions: dict, batch_size: int = 1000) -> AsyncIterator[List[str]]:
+        """Выдает комбинации по условиям пачками в алфавитном порядке, не собирая их все в памяти"""
+        words = iter_possible_words(conditions)
+        while True:
+            # Семафор берется на каждую пачку, чтобы длинный поток не занимал слот целиком
+            async with self._semaphore:
+                batch = await self._run(lambda: list(islice(words, batch_size)))
+            if not batch:
+                return
+            yield batch
@@ -2,40 +2,72 @@
 # -*- coding: utf-8 -*-
 
 import sys
-import requests
-import re
 from typing import List, Set, Dict
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QGridLayout, QLabel, QLineEdit, 
                              QPushButton, QTextEdit, QCheckBox, QSpinBox,
                              QGroupBox, QScrollArea, QFrame, QMessageBox,
-                             QFileDialog, QProgressBar, QTabWidget)
+                             QFileDialog, QProgressBar, QTabWidget, QComboBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon
 
+from word_generator import (sample_possible_words, letter_frequencies, bigram_frequencies,
+                            load_ngram_model, top_k_possible_words, WordIndex,
+                            signature_bounds, matches_signature, iter_possible_words,
+                            find_by_pattern, fuzzy_filter_words, load_dictionaries,
+                            DICTIONARY_SOURCES, FALLBACK_SOURCE, WordList,
+                            RUSSIAN_ALPHABET, write_numbered_words)
+
+# Сколько комбинаций показывать во вкладке результатов
+DISPLAY_LIMIT = 1000
+
 class WordGeneratorThread(QThread):
     """Поток для генерации слов, чтобы не блокировать интерфейс"""
     progress_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(dict)
     
-    def __init__(self, conditions):
+    def __init__(self, conditions, dictionary_cache):
         super().__init__()
         self.conditions = conditions
+        self.dictionary_cache = dictionary_cache  # {(длина, источники, ё→е): WordIndex}
     
     def run(self):
         try:
             self.progress_signal.emit("Загружаем словарь...")
-            dictionary_words = self.get_russian_words()
+            # Шаблон может задавать слова любой длины
+            pattern = self.conditions['pattern']
+            dictionary_index = self.get_dictionary_index(None if pattern else self.conditions['word_length'])
+            if self.conditions['sources']:
+                dictionary_index = dictionary_index.restrict(self.conditions['sources'])
+            dictionary_words = dictionary_index.words
             
-            self.progress_signal.emit("Фильтруем слова по условиям...")
-            filtered_words = self.filter_words_by_conditions(dictionary_words, self.conditions)
+            if pattern:
+                self.progress_signal.emit("Ищем слова по шаблону...")
+                filtered_words = find_by_pattern(dictionary_index, pattern, self.conditions)
+            else:
+                self.progress_signal.emit("Фильтруем слова по условиям...")
+                filtered_words = self.filter_words_by_conditions(dictionary_index, self.conditions)
             
-            self.progress_signal.emit("Генерируем комбинации...")
-            possible_combinations = self.generate_possible_words(self.conditions)
+            if self.conditions['top_k'] > 0:
+                self.progress_signal.emit("Ищем самые правдоподобные комбинации...")
+                model = load_ngram_model(dictionary_words)
+                possible_combinations = [word for word, score in
+                                         top_k_possible_words(self.conditions, model, self.conditions['top_k'])]
+            elif self.conditions['sample_size'] > 0:
+                self.progress_signal.emit("Выбираем случайные комбинации...")
+                possible_combinations = self.sample_possible_words(dictionary_words, self.conditions)
+            else:
+                self.progress_signal.emit("Генерируем комбинации...")
+                possible_combinations = self.generate_possible_words(self.conditions)
             
             self.progress_signal.emit("Проверяем реальные существительные...")
-            real_nouns = [word for word in possible_combinations 
-                         if word in dictionary_words and self.is_noun(word)]
+            if isinstance(possible_combinations, WordList):
+                # Идем по словарю и ищем слова в упакованном списке, не создавая строки всех комбинаций
+                real_nouns = sorted(word for word in dictionary_index.words_of_length(self.conditions['word_length'])
+                                    if word in possible_combinations and self.is_noun(word))
+            else:
+                real_nouns = [word for word in possible_combinations 
+                             if word in dictionary_words and self.is_noun(word)]
             
             results = {
                 'dictionary_words': len(dictionary_words),
@@ -49,23 +81,20 @@ class WordGeneratorThread(QThread):
         except Exception as e:
             self.progress_signal.emit(f"Ошибка: {str(e)}")
     
-    def get_russian_words(self) -> Set[str]:
-        """Загружает список русских слов из интернета"""
-        try:
-            url = "https://raw.githubusercontent.com/danakt/russian-words/master/russian.txt"
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                words = set()
-                for line in response.text.split('\n'):
-                    word = line.strip().lower()
-                    if len(word) == 5 and re.match(r'^[а-яё]+$', word):
-                        words.add(word)
-                return words
-        except:
-            pass
+    def get_dictionary_index(self, word_length: int = 5) -> WordIndex:
+        """Загружает словари параллельно (или берет уже загруженные) в индекс с пометкой источников"""
+        sources = DICTIONARY_SOURCES + self.conditions['dictionary_files']
+        key = (word_length, tuple(sources), self.conditions['fold_yo'])
+        if key in self.dictionary_cache:
+            return self.dictionary_cache[key]
+        
+        index = load_dictionaries(sources, word_length, self.conditions['fold_yo'])
+        if index.words:
+            self.dictionary_cache[key] = index
+            return index
         
         # Базовый список слов
-        return {
+        words = {
             'метла', 'булка', 'книга', 'лапша', 'мама', 'ночь', 'окно', 
             'печь', 'рука', 'стол', 'тень', 'ухо', 'флаг', 'хлеб', 'царь', 
             'чай', 'шар', 'щетка', 'эхо', 'юла', 'яма', 'парта', 'театр',
@@ -74,6 +103,7 @@ class WordGeneratorThread(QThread):
             'гора', 'река', 'город', 'село', 'сад', 'путь', 'день', 'год', 
             'час', 'минута', 'секунда', 'утро', 'вечер', 'неделя', 'месяц'
         }
+        return WordIndex(words, {word: 1 for word in words}, [FALLBACK_SOURCE])
     
     def is_noun(self, word: str) -> bool:
         """Проверяет, является ли слово существительным"""
@@ -124,40 +154,39 @@ class WordGeneratorThread(QThread):
         
         return False
     
-    def filter_words_by_conditions(self, words: Set[str], conditions: dict) -> List[str]:
+    def filter_words_by_conditions(self, index: WordIndex, conditions: dict) -> List[str]:
         """Фильтрует слова по заданным условиям"""
-        forbidden_letters = set(conditions['forbidden_letters'])
-        required_letters = set(conditions['required_letters'])
         word_length = conditions['word_length']
         positional_must = conditions['positional_must']  # {буква: [позиции]}
         positional_forbidden = conditions['positional_forbidden']  # {буква: [позиции]}
         only_nouns = conditions['only_nouns']
         exclude_verbs = conditions['exclude_verbs']
         
-        # Доступные буквы
-        all_russian_letters = set('абвгдеёжзийклмнопрстуфхцчшщъыьэюя')
-        available_letters = all_russian_letters - forbidden_letters
+        # Запрещенные, обязательные буквы и их количество проверяем по векторам количества букв
+        bounds = signature_bounds(conditions)
         
         filtered_words = []
         
-        for word in words:
-            if len(word) != word_length:
-                continue
-                
-            # Проверяем доступные буквы
-            if not all(letter in available_letters for letter in word):
-                continue
-            
-            # Проверяем обязательные буквы
-            if required_letters and not all(letter in word for letter in required_letters):
+        # С допуском правок позиционные условия проверяет автомат Левенштейна
+        if conditions['max_edits'] > 0:
+            for word in fuzzy_filter_words(index, conditions):
+                if only_nouns and not self.is_noun(word):
+                    continue
+                if exclude_verbs and self.is_verb(word):
+                    continue
+                filtered_words.append(word)
+            return sorted(filtered_words)
+        
+        words, signatures = index.signature_table(word_length)
+        size = len(RUSSIAN_ALPHABET)
+        for i, word in enumerate(words):
+            # Проверяем доступные и обязательные буквы и их количество
+            if not matches_signature(signatures, bounds, i * size):
                 continue
             
             # Проверяем обязательные позиции букв
             skip_word = False
             for letter, positions in positional_must.items():
-                if letter not in word:
-                    skip_word = True
-                    break
                 for pos in positions:
                     if word[pos] != letter:
                         skip_word = True
@@ -222,52 +251,24 @@ class WordGeneratorThread(QThread):
         
         return False
     
-    def generate_possible_words(self, conditions: dict) -> List[str]:
+    def generate_possible_words(self, conditions: dict) -> WordList:
         """Генерирует возможные слова по условиям"""
-        forbidden_letters = set(conditions['forbidden_letters'])
-        required_letters = set(conditions['required_letters'])
-        word_length = conditions['word_length']
-        positional_must = conditions['positional_must']
-        positional_forbidden = conditions['positional_forbidden']
-        
-        all_russian_letters = set('абвгдеёжзийклмнопрстуфхцчшщъыьэюя')
-        available_letters = all_russian_letters - forbidden_letters
-        
-        possible_words = []
-        
-        def is_valid(word: str) -> bool:
-            # Проверяем обязательные буквы
-            if required_letters and not all(letter in word for letter in required_letters):
-                return False
-            
-            # Проверяем обязательные позиции
-            for letter, positions in positional_must.items():
-                if letter not in word:
-                    return False
-                for pos in positions:
-                    if word[pos] != letter:
-                        return False
-            
-            # Проверяем запрещенные позиции
-            for letter, positions in positional_forbidden.items():
-                if letter not in word:
-                    continue
-                for pos in positions:
-                    if word[pos] == letter:
-                        return False
-            return True
-        
-        def generate_combinations(current_word, position):
-            if position == word_length:
-                if is_valid(current_word):
-                    possible_words.append(current_word)
-                return
-            
-            for letter in available_letters:
-                generate_combinations(current_word + letter, position + 1)
-        
-        generate_combinations("", 0)
-        return sorted(list(set(possible_words)))
+        # Обход с отсечениями сразу дает слова в алфавитном порядке и без повторов
+        return WordList.from_words(iter_possible_words(conditions), conditions['word_length'])
+    
+    def sample_possible_words(self, dictionary_words: Set[str], conditions: dict) -> List[str]:
+        """Выбирает случайные комбинации по условиям без полного перебора"""
+        letter_weights = None
+        bigram_weights = None
+        if conditions['sample_weights'] == 'letters':
+            letter_weights = letter_frequencies(dictionary_words)
+        elif conditions['sample_weights'] == 'bigrams':
+            bigram_weights = bigram_frequencies(dictionary_words)
+        
+        return sample_possible_words(conditions, conditions['sample_size'],
+                                     seed=conditions['sample_seed'],
+                                     letter_weights=letter_weights,
+                                     bigram_weights=bigram_weights)
 
 
 class WordGeneratorGUI(QMainWindow):
@@ -301,13 +302,27 @@ class WordGeneratorGUI(QMainWindow):
             'required_letters': set(),
             'positional_must': {},  # {буква: [позиции (0-based)]}
             'positional_forbidden': {},  # {буква: [позиции (0-based)]}
+            'letter_counts': {},  # {буква: (минимум, максимум или None)}
+            'pattern': '',  # шаблон слова, например: ?р[ае]*в(ь)
+            'max_edits': 0,  # допустимое число правок в позиционных условиях
+            'dictionary_files': [],  # дополнительные словари: файлы и архивы .gz/.bz2
+            'sources': [],  # имена источников для фильтра (пусто - все)
+            'fold_yo': False,
+            'substitutions_only': False,
             'only_nouns': True,
-            'exclude_verbs': True
+            'exclude_verbs': True,
+            'sample_size': 0,  # 0 - все комбинации
+            'sample_seed': None,
+            'sample_weights': 'uniform',
+            'top_k': 0  # 0 - без ранжирования
         }
         
         # Поток для генерации
         self.generator_thread = None
         
+        # Загруженные словари, чтобы фильтр по источникам не требовал повторной загрузки
+        self.dictionary_cache = {}
+        
     def create_settings_panel(self):
         """Создает панель с настройками"""
         panel = QWidget()
@@ -318,6 +333,30 @@ class WordGeneratorGUI(QMainWindow):
         title.setFont(QFont("Arial", 14, QFont.Bold))
         layout.addWidget(title)
         
+        # Словари
+        dictionary_group = QGroupBox("Словари")
+        dictionary_layout = QGridLayout(dictionary_group)
+        
+        self.dictionary_files_input = QLineEdit()
+        self.dictionary_files_input.setPlaceholderText("Дополнительные файлы через ; (.txt, .gz, .bz2)")
+        self.dictionary_files_input.textChanged.connect(self.update_dictionary_settings)
+        dictionary_layout.addWidget(self.dictionary_files_input, 0, 0)
+        
+        add_dictionary_btn = QPushButton("📂")
+        add_dictionary_btn.setMaximumWidth(40)
+        add_dictionary_btn.clicked.connect(self.add_dictionary_file)
+        dictionary_layout.addWidget(add_dictionary_btn, 0, 1)
+        
+        self.sources_input = QLineEdit()
+        self.sources_input.setPlaceholderText("Только источники через запятую (например: russian.txt)")
+        self.sources_input.textChanged.connect(self.update_dictionary_settings)
+        dictionary_layout.addWidget(self.sources_input, 1, 0, 1, 2)
+        
+        self.fold_yo_checkbox = QCheckBox("Считать ё как е")
+        self.fold_yo_checkbox.stateChanged.connect(self.update_dictionary_settings)
+        dictionary_layout.addWidget(self.fold_yo_checkbox, 2, 0, 1, 2)
+        layout.addWidget(dictionary_group)
+        
         # Длина слова
         length_group = QGroupBox("Длина слова")
         length_layout = QHBoxLayout(length_group)
@@ -373,19 +412,36 @@ class WordGeneratorGUI(QMainWindow):
         positional_layout = QVBoxLayout(positional_group)
         
         self.positional_input = QLineEdit()
-        self.positional_input.setPlaceholderText("Формат: буква=позиция или буква≠позиция (например: о=2, в≠1,4)")
+        self.positional_input.setPlaceholderText("Формат: буква=позиция, буква≠позиция, буква#количество (например: о=2, в≠1,4, е#2)")
         self.positional_input.textChanged.connect(self.update_positional_constraints)
         positional_layout.addWidget(self.positional_input)
         
         # Подсказка
         hint = QLabel("• Используйте = для обязательных позиций (например: о=2)\n"
                      "• Используйте ≠ для запрещенных позиций (например: в≠1,4)\n"
+                     "• Используйте # для количества букв: е#2 (ровно 2), р#0-1 (от 0 до 1), е#2+ (не меньше 2)\n"
                      "• Позиции указываются от 1 до длины слова")
         hint.setStyleSheet("color: #666; font-size: 10pt;")
         positional_layout.addWidget(hint)
         
         layout.addWidget(positional_group)
         
+        # Шаблон слова
+        pattern_group = QGroupBox("Шаблон слова")
+        pattern_layout = QVBoxLayout(pattern_group)
+        
+        self.pattern_input = QLineEdit()
+        self.pattern_input.setPlaceholderText("Например: ?р[ае]*в(ь)")
+        self.pattern_input.textChanged.connect(self.update_pattern)
+        pattern_layout.addWidget(self.pattern_input)
+        
+        pattern_hint = QLabel("• ? - любая буква, * - любое количество букв\n"
+                              "• [ае] - одна из букв, [^ае] - любая, кроме этих\n"
+                              "• (ь) - необязательная буква; длина слова берется из шаблона")
+        pattern_hint.setStyleSheet("color: #666; font-size: 10pt;")
+        pattern_layout.addWidget(pattern_hint)
+        layout.addWidget(pattern_group)
+        
         # Дополнительные фильтры
         filters_group = QGroupBox("Дополнительные фильтры")
         filters_layout = QVBoxLayout(filters_group)
@@ -399,8 +455,59 @@ class WordGeneratorGUI(QMainWindow):
         self.exclude_verbs_checkbox.setChecked(True)
         self.exclude_verbs_checkbox.stateChanged.connect(self.update_conditions)
         filters_layout.addWidget(self.exclude_verbs_checkbox)
+        
+        edits_layout = QHBoxLayout()
+        self.max_edits_spinbox = QSpinBox()
+        self.max_edits_spinbox.setRange(0, 3)
+        self.max_edits_spinbox.setSpecialValueText("точно")
+        self.max_edits_spinbox.valueChanged.connect(self.update_conditions)
+        edits_layout.addWidget(QLabel("Допустимые ошибки в позициях:"))
+        edits_layout.addWidget(self.max_edits_spinbox)
+        filters_layout.addLayout(edits_layout)
+        
+        self.substitutions_only_checkbox = QCheckBox("Только замены букв")
+        self.substitutions_only_checkbox.stateChanged.connect(self.update_conditions)
+        filters_layout.addWidget(self.substitutions_only_checkbox)
         layout.addWidget(filters_group)
         
+        # Случайная выборка комбинаций
+        sample_group = QGroupBox("Случайная выборка комбинаций")
+        sample_layout = QGridLayout(sample_group)
+        
+        self.sample_spinbox = QSpinBox()
+        self.sample_spinbox.setRange(0, 100000)
+        self.sample_spinbox.setSpecialValueText("все")
+        self.sample_spinbox.valueChanged.connect(self.update_conditions)
+        sample_layout.addWidget(QLabel("Количество:"), 0, 0)
+        sample_layout.addWidget(self.sample_spinbox, 0, 1)
+        
+        self.seed_spinbox = QSpinBox()
+        self.seed_spinbox.setRange(0, 999999)
+        self.seed_spinbox.setSpecialValueText("случайно")
+        self.seed_spinbox.valueChanged.connect(self.update_conditions)
+        sample_layout.addWidget(QLabel("Зерно:"), 1, 0)
+        sample_layout.addWidget(self.seed_spinbox, 1, 1)
+        
+        self.weights_combo = QComboBox()
+        self.weights_combo.addItem("Равномерно", 'uniform')
+        self.weights_combo.addItem("По частоте букв", 'letters')
+        self.weights_combo.addItem("По частоте биграмм", 'bigrams')
+        self.weights_combo.currentIndexChanged.connect(self.update_conditions)
+        sample_layout.addWidget(QLabel("Распределение:"), 2, 0)
+        sample_layout.addWidget(self.weights_combo, 2, 1)
+        layout.addWidget(sample_group)
+        
+        # Ранжирование комбинаций по n-граммной модели словаря
+        top_group = QGroupBox("Правдоподобные комбинации")
+        top_layout = QHBoxLayout(top_group)
+        self.top_k_spinbox = QSpinBox()
+        self.top_k_spinbox.setRange(0, 10000)
+        self.top_k_spinbox.setSpecialValueText("выкл.")
+        self.top_k_spinbox.valueChanged.connect(self.update_conditions)
+        top_layout.addWidget(QLabel("Лучшие K:"))
+        top_layout.addWidget(self.top_k_spinbox)
+        layout.addWidget(top_group)
+        
         # Кнопки управления
         buttons_layout = QHBoxLayout()
         
@@ -478,6 +585,30 @@ class WordGeneratorGUI(QMainWindow):
         self.conditions['word_length'] = self.length_spinbox.value()
         self.conditions['only_nouns'] = self.only_nouns_checkbox.isChecked()
         self.conditions['exclude_verbs'] = self.exclude_verbs_checkbox.isChecked()
+        self.conditions['max_edits'] = self.max_edits_spinbox.value()
+        self.conditions['substitutions_only'] = self.substitutions_only_checkbox.isChecked()
+        self.conditions['sample_size'] = self.sample_spinbox.value()
+        self.conditions['sample_seed'] = self.seed_spinbox.value() or None
+        self.conditions['sample_weights'] = self.weights_combo.currentData()
+        self.conditions['top_k'] = self.top_k_spinbox.value()
+    
+    def update_dictionary_settings(self):
+        """Обновляет источники словаря"""
+        files = [path.strip() for path in self.dictionary_files_input.text().split(';') if path.strip()]
+        sources = [name.strip() for name in self.sources_input.text().split(',') if name.strip()]
+        self.conditions['dictionary_files'] = files
+        self.conditions['sources'] = sources
+        self.conditions['fold_yo'] = self.fold_yo_checkbox.isChecked()
+    
+    def add_dictionary_file(self):
+        """Добавляет файл словаря через диалог"""
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Добавить словарь", "", "Словари (*.txt *.gz *.bz2);;Все файлы (*)"
+        )
+        if filename:
+            files = [path for path in self.dictionary_files_input.text().split(';') if path.strip()]
+            files.append(filename)
+            self.dictionary_files_input.setText(';'.join(files))
     
     def update_forbidden_letters(self):
         """Обновляет запрещенные буквы"""
@@ -496,14 +627,33 @@ class WordGeneratorGUI(QMainWindow):
         text = self.positional_input.text().lower()
         must = {}
         forbidden = {}
+        counts = {}
         
         for part in text.split(','):
             part = part.strip()
             if not part:
                 continue
-                
+            
+            # Обработка формата "е#2", "р#0-1", "е#2+" (количество буквы в слове)
+            if '#' in part:
+                letter, count_str = part.split('#', 1)
+                letter = letter.strip()
+                count_str = count_str.strip()
+                try:
+                    if count_str.endswith('+'):
+                        low, high = int(count_str[:-1]), None
+                    elif '-' in count_str:
+                        low_str, high_str = count_str.split('-', 1)
+                        low, high = int(low_str or 0), int(high_str)
+                    else:
+                        low = high = int(count_str)
+                except ValueError:
+                    continue
+                if low >= 0 and (high is None or high >= low):
+                    counts[letter] = (low, high)
+            
             # Обработка формата "о=2" (буква "о" на 2-й позиции)
-            if '=' in part:
+            elif '=' in part:
                 letter, pos_str = part.split('=', 1)
                 letter = letter.strip()
                 try:
@@ -528,6 +678,11 @@ class WordGeneratorGUI(QMainWindow):
         
         self.conditions['positional_must'] = must
         self.conditions['positional_forbidden'] = forbidden
+        self.conditions['letter_counts'] = counts
+    
+    def update_pattern(self):
+        """Обновляет шаблон слова"""
+        self.conditions['pattern'] = self.pattern_input.text().strip().lower()
     
     def toggle_forbidden_letter(self, letter):
         """Переключает букву в запрещенных"""
@@ -564,9 +719,11 @@ class WordGeneratorGUI(QMainWindow):
         self.update_forbidden_letters()
         self.update_required_letters()
         self.update_positional_constraints()
+        self.update_pattern()
+        self.update_dictionary_settings()
         
         # Запускаем поток
-        self.generator_thread = WordGeneratorThread(self.conditions)
+        self.generator_thread = WordGeneratorThread(self.conditions, self.dictionary_cache)
         self.generator_thread.progress_signal.connect(self.update_progress)
         self.generator_thread.finished_signal.connect(self.show_results)
         self.generator_thread.start()
@@ -586,7 +743,7 @@ class WordGeneratorGUI(QMainWindow):
         real_nouns = results['real_nouns']
         
         self.dictionary_text.setText('\n'.join(f"{i+1:4d}. {word}" for i, word in enumerate(filtered_words)))
-        self.combinations_text.setText('\n'.join(f"{i+1:4d}. {word}" for i, word in enumerate(possible_combinations)))
+        self.combinations_text.setText(self.format_combinations(possible_combinations))
         self.nouns_text.setText('\n'.join(f"{i+1:4d}. {word}" for i, word in enumerate(real_nouns)))
         
         # Обновляем статистику
@@ -602,6 +759,13 @@ class WordGeneratorGUI(QMainWindow):
         # Сохраняем результаты для сохранения в файл
         self.current_results = results
     
+    def format_combinations(self, words) -> str:
+        """Нумерует для показа только первые DISPLAY_LIMIT комбинаций (остальные - в файле при сохранении)"""
+        lines = [f"{i+1:4d}. {word}" for i, word in enumerate(words[:DISPLAY_LIMIT])]
+        if len(words) > DISPLAY_LIMIT:
+            lines.append(f"... и еще {len(words) - DISPLAY_LIMIT} (все слова - при сохранении в файл)")
+        return '\n'.join(lines)
+    
     def save_results(self):
         """Сохраняет результаты в файл"""
         if not hasattr(self, 'current_results'):
@@ -623,6 +787,7 @@ class WordGeneratorGUI(QMainWindow):
                     f.write(f"• Запрещенные буквы: {', '.join(sorted(self.conditions['forbidden_letters']))}\n")
                     f.write(f"• Обязательные буквы: {', '.join(sorted(self.conditions['required_letters']))}\n")
                     f.write(f"• Позиционные ограничения: {self.positional_input.text()}\n")
+                    f.write(f"• Шаблон: {self.conditions['pattern']}\n")
                     f.write(f"• Только существительные: {self.conditions['only_nouns']}\n")
                     f.write(f"• Исключить глаголы: {self.conditions['exclude_verbs']}\n\n")
                     
@@ -639,8 +804,7 @@ class WordGeneratorGUI(QMainWindow):
                     
                     f.write("\nВсе комбинации:\n")
                     f.write("-" * 30 + "\n")
-                    for i, word in enumerate(self.current_results['possible_combinations'], 1):
-                        f.write(f"{i:4d}. {word}\n")
+                    write_numbered_words(f, self.current_results['possible_combinations'])
                     
                     f.write("\nРеальные существительные:\n")
                     f.write("-" * 30 + "\n")
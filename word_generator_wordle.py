@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import argparse
+from array import array
+from collections import Counter
+from typing import List, Set, Tuple, Optional
+
+from word_generator import get_russian_words, is_noun, make_conditions, filter_words_by_conditions, WordIndex
+
+# Цифры ответа игры: 2 - буква на месте, 1 - буква есть в другом месте, 0 - буквы нет
+FEEDBACK_DIGITS = {'2': 2, '1': 1, '0': 0, 'з': 2, 'ж': 1, 'с': 0, '+': 2, '?': 1, '-': 0}
+
+def feedback_pattern(guess: str, answer: str) -> int:
+    """Возвращает код ответа игры на попытку guess при загаданном слове answer"""
+    remaining = {}
+    for g, a in zip(guess, answer):
+        if g != a:
+            remaining[a] = remaining.get(a, 0) + 1
+
+    code = 0
+    power = 1
+    for g, a in zip(guess, answer):
+        if g == a:
+            code += 2 * power
+        elif remaining.get(g, 0) > 0:
+            remaining[g] -= 1
+            code += power
+        power *= 3
+    return code
+
+def parse_feedback(text: str) -> List[int]:
+    """Разбирает ответ игры вида '20110' или 'зжссж' в список цифр по позициям"""
+    digits = []
+    for char in text.strip().lower():
+        if char not in FEEDBACK_DIGITS:
+            raise ValueError(f"Неизвестный символ ответа: {char}")
+        digits.append(FEEDBACK_DIGITS[char])
+    return digits
+
+def encode_feedback(digits: List[int]) -> int:
+    """Переводит цифры ответа в код, совместимый с feedback_pattern"""
+    return sum(digit * 3 ** i for i, digit in enumerate(digits))
+
+def apply_feedback(conditions: dict, guess: str, digits: List[int]):
+    """Дополняет условия ответом игры на одну попытку"""
+    present = {letter for letter, digit in zip(guess, digits) if digit > 0}
+    letter_counts = conditions.setdefault('letter_counts', {})
+
+    for pos, (letter, digit) in enumerate(zip(guess, digits)):
+        if digit == 2:
+            positions = conditions['positional_must'].setdefault(letter, [])
+        elif digit == 1 or letter in present:
+            # Буква есть в слове, но не здесь (или повторов этой буквы меньше)
+            conditions['required_letters'].add(letter)
+            positions = conditions['positional_forbidden'].setdefault(letter, [])
+        else:
+            conditions['forbidden_letters'].add(letter)
+            continue
+        if pos not in positions:
+            positions.append(pos)
+
+    # Серая буква при зеленых/желтых повторах задает точное количество, иначе - минимум
+    for letter in present:
+        marked = sum(1 for g, digit in zip(guess, digits) if g == letter and digit > 0)
+        exact = any(g == letter and digit == 0 for g, digit in zip(guess, digits))
+        low, high = letter_counts.get(letter, (0, None))
+        low = max(low, marked)
+        if exact:
+            high = marked if high is None else min(high, marked)
+        letter_counts[letter] = (low, high)
+
+class WordleSolver:
+    """Решатель игры в духе Wordle/5 букв.
+
+    Хранит текущий список кандидатов и таблицу кодов ответов
+    {попытка: коды по кандидатам}; после каждого хода кандидаты и
+    строки таблицы сужаются по индексам, а не пересчитываются заново.
+    Ответы игры также накапливаются в условиях self.conditions; в
+    сложном режиме (hard_mode) попытки выбираются только из слов,
+    подходящих под эти условия.
+    """
+
+    def __init__(self, dictionary_words: Set[str], word_length: int = 5, only_nouns: bool = False,
+                 max_guesses: int = 100, max_candidates: int = 1000, seed: int = 0, hard_mode: bool = False):
+        self.conditions = make_conditions(word_length=word_length, only_nouns=only_nouns)
+        self.dictionary = sorted(word for word in dictionary_words if len(word) == word_length)
+        self.hard_mode = hard_mode
+        self._index = WordIndex(self.dictionary)
+        self.candidates = [word for word in self.dictionary if not only_nouns or is_noun(word)]
+        self.max_guesses = max_guesses
+        self.max_candidates = max_candidates
+        self.rng = random.Random(seed)
+        self._rows = {}  # {попытка: array кодов по self.candidates}
+
+    def _row(self, guess: str) -> array:
+        """Возвращает коды ответов на попытку для всех текущих кандидатов"""
+        row = self._rows.get(guess)
+        if row is None:
+            row = array('H', (feedback_pattern(guess, answer) for answer in self.candidates))
+            if len(self.candidates) <= self.max_candidates:
+                self._rows[guess] = row
+        return row
+
+    def update(self, guess: str, feedback: str):
+        """Учитывает попытку и ответ игры, сужая список кандидатов"""
+        guess = guess.strip().lower()
+        digits = parse_feedback(feedback)
+        if len(guess) != self.conditions['word_length'] or len(digits) != len(guess):
+            raise ValueError("Длина слова и ответа должна совпадать с длиной слова в игре")
+
+        apply_feedback(self.conditions, guess, digits)
+        code = encode_feedback(digits)
+        row = self._row(guess)
+        keep = [i for i, value in enumerate(row) if value == code]
+
+        self.candidates = [self.candidates[i] for i in keep]
+        if len(self.candidates) <= self.max_candidates:
+            self._rows = {g: array('H', (r[i] for i in keep)) for g, r in self._rows.items()}
+        else:
+            self._rows = {}
+
+    def _guess_pool(self) -> List[str]:
+        """Отбирает попытки-кандидаты по частоте букв среди оставшихся слов"""
+        letter_counts = Counter(letter for word in self.candidates for letter in set(word))
+        if self.hard_mode:
+            # Попытка должна учитывать все полученные подсказки (часть речи попытки не важна)
+            allowed = filter_words_by_conditions(self._index, dict(self.conditions, only_nouns=False))
+        else:
+            allowed = self.dictionary
+        pool = set(self.candidates) | set(allowed)
+        return sorted(pool, key=lambda word: -sum(letter_counts[letter] for letter in set(word)))[:self.max_guesses]
+
+    def best_guesses(self, n: int = 5) -> List[Tuple[str, float]]:
+        """Возвращает n попыток с наибольшей ожидаемой информацией (в битах)"""
+        if len(self.candidates) <= 2:
+            return [(word, 1.0 if len(self.candidates) == 2 else 0.0) for word in self.candidates[:n]]
+
+        if len(self.candidates) <= self.max_candidates:
+            sample = None
+            total = len(self.candidates)
+        else:
+            # Для большого словаря оцениваем энтропию по случайной подвыборке
+            sample = self.rng.sample(self.candidates, self.max_candidates)
+            total = len(sample)
+
+        candidate_set = set(self.candidates)
+        scored = []
+        for guess in self._guess_pool():
+            if sample is None:
+                counts = Counter(self._row(guess))
+            else:
+                counts = Counter(feedback_pattern(guess, answer) for answer in sample)
+            entropy = -sum(count / total * math.log2(count / total) for count in counts.values())
+            # Попытка из числа кандидатов может сразу оказаться ответом
+            if guess in candidate_set:
+                entropy += 1 / len(self.candidates)
+            scored.append((guess, entropy))
+
+        scored.sort(key=lambda item: -item[1])
+        return scored[:n]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Решатель игры в духе Wordle/5 букв")
+    parser.add_argument('--nouns', action='store_true', help="загадываются только существительные")
+    parser.add_argument('--hard', action='store_true', help="сложный режим: попытки учитывают все подсказки")
+    args = parser.parse_args(argv)
+
+    print("🎯 Решатель игры «5 букв»")
+    print("=" * 50)
+    print("Вводите попытку и ответ игры, например: кошка 20100")
+    print("2 - буква на месте, 1 - буква в другом месте, 0 - буквы нет")
+    print("Пустая строка - выход")
+    print("=" * 50)
+
+    print("📚 Загружаем русский словарь...")
+    solver = WordleSolver(get_russian_words(), only_nouns=args.nouns, hard_mode=args.hard)
+
+    while solver.candidates:
+        print(f"\n🔍 Осталось кандидатов: {len(solver.candidates)}")
+        if len(solver.candidates) <= 20:
+            print(", ".join(solver.candidates))
+        print("💡 Лучшие попытки:")
+        for guess, entropy in solver.best_guesses():
+            print(f"   {guess} ({entropy:.2f} бит)")
+        if len(solver.candidates) == 1:
+            break
+
+        line = input("> ").strip()
+        if not line:
+            break
+        try:
+            guess, feedback = line.split()
+            solver.update(guess, feedback)
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+
+    if not solver.candidates:
+        print("Подходящих слов не найдено")
+
+
+if __name__ == "__main__":
+    main()